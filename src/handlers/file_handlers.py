@@ -1,11 +1,16 @@
-from typing import Dict, Any, Optional
+from typing import AsyncIterable, Dict, Any, Optional
+from concurrent.futures import Executor
 from datetime import datetime
 from pathlib import Path
+import asyncio
 import base64
 import uuid
 
 from src.store import MemoryStore
 
+# Largest file accepted by share and share_stream
+MAX_FILE_SIZE = 10 * 1024 * 1024
+
 
 class FileHandlers:
     """Handlers for file sharing JSON-RPC methods."""
@@ -52,17 +57,10 @@ class FileHandlers:
             raise ValueError(f"Invalid base64 content: {e}")
 
         # Check size limit (10MB)
-        if len(decoded) > 10 * 1024 * 1024:
+        if len(decoded) > MAX_FILE_SIZE:
             raise ValueError("File too large (max 10MB)")
 
-        # Create workspace directory if needed
-        save_dir = self.workspace_path / project_id
-        save_dir.mkdir(parents=True, exist_ok=True)
-
-        # Generate unique filename to avoid collisions
-        unique_name = f"{uuid.uuid4().hex[:8]}_{file_name}"
-        save_path = save_dir / unique_name
-
+        save_path = self._save_path(project_id, file_name)
         save_path.write_bytes(decoded)
 
         return {
@@ -71,6 +69,54 @@ class FileHandlers:
             "size": len(decoded),
         }
 
+    async def share_stream(
+        self,
+        project_id: str,
+        file_name: str,
+        chunks: AsyncIterable[bytes],
+        executor: Optional[Executor] = None,
+    ) -> Dict[str, Any]:
+        """
+        Share a file whose raw bytes arrive as a stream.
+
+        Same result as share, but the content is written chunk by chunk as
+        it is received rather than decoded from one base64 string. Writes
+        run on executor (default: the loop's) so the event loop stays free.
+        """
+        self._get_our_repo_id(project_id)  # Validate membership
+
+        loop = asyncio.get_running_loop()
+        save_path = self._save_path(project_id, file_name)
+        size = 0
+        f = await loop.run_in_executor(executor, save_path.open, "wb")
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    raise ValueError("File too large (max 10MB)")
+                await loop.run_in_executor(executor, f.write, chunk)
+        except BaseException:
+            f.close()
+            save_path.unlink(missing_ok=True)
+            raise
+        f.close()
+
+        return {
+            "status": "received",
+            "savedTo": str(save_path),
+            "size": size,
+        }
+
+    def _save_path(self, project_id: str, file_name: str) -> Path:
+        """Pick a fresh path for a shared file, creating its directory."""
+        # Create workspace directory if needed
+        save_dir = self.workspace_path / project_id
+        save_dir.mkdir(parents=True, exist_ok=True)
+
+        # Generate unique filename to avoid collisions; keep only the base name
+        unique_name = f"{uuid.uuid4().hex[:8]}_{Path(file_name).name}"
+        return save_dir / unique_name
+
     def request(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         Request a file from other agents.
@@ -130,11 +176,10 @@ class FileHandlers:
         """
         request_id = params["requestId"]
 
-        if request_id not in self.pending_requests:
+        req_data = self.pending_requests.get(request_id)
+        if req_data is None:
             raise ValueError(f"Request {request_id} not found")
 
-        req_data = self.pending_requests[request_id]
-
         # Share the file
         result = self.share({
             "projectId": req_data["projectId"],
@@ -142,8 +187,8 @@ class FileHandlers:
             "purpose": f"Fulfilling request: {req_data['description']}",
         })
 
-        # Remove the request
-        del self.pending_requests[request_id]
+        # Remove the request (pop: may run on a worker thread alongside another fulfill)
+        self.pending_requests.pop(request_id, None)
 
         return {
             "status": "fulfilled",
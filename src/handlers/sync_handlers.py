@@ -17,6 +17,16 @@ from src.models.enums import ContractStatus
 logger = logging.getLogger(__name__)
 
 
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """Parse a serialized timestamp, or None if it isn't one we can compare."""
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
 class SyncHandlers:
     """
     Handlers for receiving state sync from peer agents.
@@ -44,6 +54,14 @@ class SyncHandlers:
 
         logger.info(f"Receiving project sync from {source_agent}: {project_data.get('project_id')}")
 
+        # Repeat pushes of state we already have are common (every peer
+        # re-broadcasts), so decide before paying for model reconstruction.
+        # The snapshot's own updated_at is not consulted: an older snapshot
+        # can still carry contracts or context we lack.
+        existing = self.store.get_project(project_data.get("project_id"))
+        if existing and not self._has_news(existing, project_data):
+            return {"status": "skipped", "reason": "nothing new"}
+
         # Reconstruct the project
         project_data["repos"] = [RepoContext(**r) for r in project_data.get("repos", [])]
         project_data["contracts"] = [
@@ -55,19 +73,30 @@ class SyncHandlers:
 
         project = Project(**project_data)
 
-        # Check if we already have this project
-        existing = self.store.get_project(project.project_id)
-        if existing:
-            # Update if the incoming data is newer
-            if project.updated_at > existing.updated_at:
-                self.store.update_project(project)
-                return {"status": "updated", "projectId": project.project_id}
-            else:
-                return {"status": "skipped", "reason": "local version is newer"}
-        else:
-            # Create new
-            self.store.create_project(project)
-            return {"status": "created", "projectId": project.project_id}
+        # Join rather than replace, so contracts and context we already got
+        # through their own syncs are kept
+        status = self.store.merge_project(project)
+        if status == "skipped":
+            return {"status": "skipped", "reason": "nothing new"}
+        return {"status": status, "projectId": project.project_id}
+
+    def _has_news(self, project: Project, project_data: Dict[str, Any]) -> bool:
+        """Whether merging the serialized project could change our copy."""
+        known_repos = {r.repo_id for r in project.repos}
+        if any(r.get("repo_id") not in known_repos for r in project_data.get("repos", [])):
+            return True
+        known_packets = {p.packet_id for p in project.context_history}
+        if any(p.get("packet_id") not in known_packets for p in project_data.get("context_history", [])):
+            return True
+        for contract_data in project_data.get("contracts", []):
+            existing = self.store.get_contract(project.project_id, contract_data.get("contract_id"))
+            incoming_at = _parse_timestamp(contract_data.get("updated_at"))
+            incoming_version = contract_data.get("version")
+            if existing is None or incoming_at is None or not isinstance(incoming_version, int):
+                return True
+            if existing.is_superseded_by(incoming_version, incoming_at):
+                return True
+        return False
 
     def contract_sync(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -88,21 +117,22 @@ class SyncHandlers:
         if not project:
             return {"status": "error", "reason": f"Project {project_id} not found"}
 
+        # Skip stale or repeated pushes before reconstructing the contract
+        existing = self.store.get_contract(project_id, contract_data.get("contract_id"))
+        incoming_at = _parse_timestamp(contract_data.get("updated_at"))
+        incoming_version = contract_data.get("version")
+        if existing and incoming_at and isinstance(incoming_version, int):
+            if not existing.is_superseded_by(incoming_version, incoming_at):
+                return {"status": "skipped", "reason": "local version is newer or same"}
+
         contract = self._reconstruct_contract(contract_data)
 
-        # Check if we already have this contract
-        existing = project.get_contract_by_id(contract.contract_id)
-        if existing:
-            # Update if newer version or newer timestamp
-            if contract.version > existing.version or contract.updated_at > existing.updated_at:
-                self.store.update_contract(project_id, contract)
-                return {"status": "updated", "contractId": contract.contract_id, "version": contract.version}
-            else:
-                return {"status": "skipped", "reason": "local version is newer or same"}
-        else:
-            # Add new contract
-            self.store.add_contract(project_id, contract)
-            return {"status": "created", "contractId": contract.contract_id}
+        status = self.store.merge_contract(project_id, contract)
+        if status == "skipped":
+            return {"status": "skipped", "reason": "local version is newer or same"}
+        if status == "updated":
+            return {"status": "updated", "contractId": contract.contract_id, "version": contract.version}
+        return {"status": "created", "contractId": contract.contract_id}
 
     def context_sync(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -123,15 +153,13 @@ class SyncHandlers:
         if not project:
             return {"status": "error", "reason": f"Project {project_id} not found"}
 
-        packet = ContextPacket(**packet_data)
-
-        # Check if we already have this packet
-        existing = self.store.get_context(project_id, packet.packet_id)
-        if existing:
+        # Packets are immutable, so a known id means a duplicate push
+        if self.store.get_context(project_id, packet_data.get("packet_id")):
             return {"status": "skipped", "reason": "already exists"}
-        else:
-            self.store.add_context(project_id, packet)
-            return {"status": "created", "packetId": packet.packet_id}
+
+        packet = ContextPacket(**packet_data)
+        self.store.add_context(project_id, packet)
+        return {"status": "created", "packetId": packet.packet_id}
 
     def repo_sync(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -26,6 +26,7 @@ from dotenv import load_dotenv
 
 from src.store import MemoryStore
 from src.transport import create_app, PeerRegistry
+from src.transport.peer_registry import PEER_CONNECT_TIMEOUT
 from src.adp import ADPClient
 
 # Load environment variables
@@ -154,6 +155,49 @@ def main():
         help="Agent ID (AID format for ADP, e.g., aid://example.com/agent@1.0.0)",
     )
 
+    parser.add_argument(
+        "--batch-window",
+        type=float,
+        default=0.0,
+        help="Seconds to coalesce peer broadcasts into one JSON-RPC batch (0 = off)",
+    )
+
+    parser.add_argument(
+        "--broadcast-timeout",
+        type=float,
+        default=None,
+        help="Seconds a broadcast waits on each peer (default: request timeout)",
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        default=None,
+        help=f"Seconds to wait for a connection to a peer (default: {PEER_CONNECT_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--background-broadcasts",
+        action="store_true",
+        help="Reply to write RPCs without waiting for peers to be updated",
+    )
+
+    parser.add_argument(
+        "--sync-flush-interval",
+        type=float,
+        default=0.0,
+        help="Seconds to coalesce contract-sync broadcasts per contract (0 = off)",
+    )
+    parser.add_argument(
+        "--cors-origin",
+        action="append",
+        default=None,
+        help="Browser origin allowed to call the agent (repeatable; default: any)",
+    )
+    parser.add_argument(
+        "--access-log",
+        action="store_true",
+        help="Log every HTTP request (off by default; peers make many small calls)",
+    )
+
     # ADP options
     parser.add_argument(
         "--adp-url",
@@ -196,6 +240,7 @@ def main():
     adp_url = args.adp_url if args.adp_url != "https://agentic-exchange.metisos.co" else adp_config.get("exchange_url", "https://agentic-exchange.metisos.co")
     auto_register = args.register_adp or adp_config.get("auto_register", False)
     require_adp = args.require_adp or config.get("mode") == "production"
+    cors_origins = args.cors_origin or server_config.get("cors_origins")
 
     # Validate required args
     if not repo:
@@ -223,6 +268,9 @@ def main():
         self_agent_id=agent_id,
         self_endpoint=endpoint,
         adp_client=adp_client,
+        batch_window=args.batch_window,
+        broadcast_timeout=args.broadcast_timeout,
+        connect_timeout=args.connect_timeout,
     )
 
     # Register with ADP if requested
@@ -248,6 +296,9 @@ def main():
         workspace_path=args.workspace,
         peer_registry=peer_registry,
         self_endpoint=endpoint,
+        background_broadcasts=args.background_broadcasts,
+        sync_flush_interval=args.sync_flush_interval,
+        cors_origins=cors_origins,
     )
 
     # Start server
@@ -261,11 +312,16 @@ def main():
     if persist_path:
         logger.info(f"  Persistence: {persist_path}")
 
+    # One worker only: the store and peer registry live in this process.
+    # loop/http "auto" pick uvloop and httptools when uvicorn[standard] is installed.
     uvicorn.run(
         app,
         host=host,
         port=port,
         log_level="info",
+        loop="auto",
+        http="auto",
+        access_log=args.access_log,
     )
 
 
@@ -75,6 +75,22 @@ class Contract(BaseModel):
             return True
         return False
 
+    def is_superseded_by(self, version: int, updated_at: datetime) -> bool:
+        """
+        Whether a peer's copy at (version, updated_at) replaces this one.
+
+        Last writer wins on version, then updated_at. That is a total order,
+        so peers converge whatever order syncs arrive in, and re-applying a
+        copy we already have is a no-op. Timestamps that can't be compared
+        (naive vs aware) count as newer.
+        """
+        if version != self.version:
+            return version > self.version
+        try:
+            return updated_at > self.updated_at
+        except TypeError:
+            return True
+
     def get_implementation(self, repo_id: str) -> Optional[Implementation]:
         return next((i for i in self.implementations if i.repo_id == repo_id), None)
 
@@ -4,6 +4,9 @@ import secrets
 import hashlib
 from typing import Tuple
 
+# Environments a key can be issued for; is_valid_key_format accepts only these
+KEY_ENVIRONMENTS = ("live", "test")
+
 
 def generate_api_key(agent_id: str, environment: str = "live") -> Tuple[str, str]:
     """
@@ -17,7 +20,12 @@ def generate_api_key(agent_id: str, environment: str = "live") -> Tuple[str, str
         Tuple of (api_key, key_hash)
         - api_key: The actual key to give to the agent (store securely)
         - key_hash: SHA-256 hash to store in database
+
+    Raises:
+        ValueError: If environment is not one of KEY_ENVIRONMENTS
     """
+    if environment not in KEY_ENVIRONMENTS:
+        raise ValueError(f"environment must be one of {KEY_ENVIRONMENTS}, got {environment!r}")
     random_part = secrets.token_urlsafe(24)
     key = f"cacp_sk_{environment}_{random_part}"
     key_hash = hashlib.sha256(key.encode()).hexdigest()
@@ -35,6 +43,9 @@ def validate_api_key(provided_key: str, stored_hash: str) -> bool:
     Returns:
         True if valid, False otherwise
     """
+    # Cheap negative path: malformed keys can never match, so skip the hash
+    if not is_valid_key_format(provided_key):
+        return False
     provided_hash = hashlib.sha256(provided_key.encode()).hexdigest()
     return secrets.compare_digest(provided_hash, stored_hash)
 
@@ -46,4 +57,4 @@ def is_valid_key_format(key: str) -> bool:
     parts = key.split("_")
     if len(parts) < 4:
         return False
-    return parts[0] == "cacp" and parts[1] == "sk" and parts[2] in ("live", "test")
+    return parts[0] == "cacp" and parts[1] == "sk" and parts[2] in KEY_ENVIRONMENTS
@@ -1,19 +1,20 @@
 """Project invite system for CACP agent onboarding."""
 
+import heapq
 import secrets
 import hashlib
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Sequence, Tuple
 
 
-@dataclass
+@dataclass(slots=True)
 class Invite:
     """Represents a project invitation."""
     code: str
     project_id: str
     repo_name: str
-    permissions: List[str]
+    permissions: Sequence[str]
     created_at: datetime = field(default_factory=datetime.utcnow)
     expires_at: datetime = field(default_factory=lambda: datetime.utcnow() + timedelta(hours=24))
     redeemed: bool = False
@@ -26,12 +27,15 @@ class InviteManager:
 
     def __init__(self):
         self.invites: Dict[str, Invite] = {}
+        # Min-heap of (expires_at, code) so sweeps only touch expired invites.
+        # Revoked codes leave stale entries behind; they are skipped on pop.
+        self._expiry_heap: List[Tuple[datetime, str]] = []
 
     def create_invite(
         self,
         project_id: str,
         repo_name: str,
-        permissions: List[str],
+        permissions: Sequence[str],
         expires_in_hours: int = 24,
     ) -> str:
         """
@@ -52,15 +56,18 @@ class InviteManager:
         checksum = hashlib.sha256(f"{project_id}{random_part}".encode()).hexdigest()[:2]
         code = f"INV-{project_short}-{random_part}-{checksum}"
 
+        now = datetime.utcnow()
         invite = Invite(
             code=code,
             project_id=project_id,
             repo_name=repo_name,
             permissions=permissions,
-            expires_at=datetime.utcnow() + timedelta(hours=expires_in_hours),
+            created_at=now,
+            expires_at=now + timedelta(hours=expires_in_hours),
         )
 
         self.invites[code] = invite
+        heapq.heappush(self._expiry_heap, (invite.expires_at, code))
         return code
 
     def get_invite(self, code: str) -> Optional[Invite]:
@@ -89,13 +96,14 @@ class InviteManager:
         if invite.redeemed:
             raise ValueError("Invite has already been redeemed")
 
-        if datetime.utcnow() > invite.expires_at:
+        now = datetime.utcnow()
+        if now > invite.expires_at:
             raise ValueError("Invite has expired")
 
         # Mark as redeemed
         invite.redeemed = True
         invite.redeemed_by = agent_id
-        invite.redeemed_at = datetime.utcnow()
+        invite.redeemed_at = now
 
         return invite
 
@@ -109,10 +117,15 @@ class InviteManager:
     def cleanup_expired(self) -> int:
         """Remove expired invites. Returns count of removed invites."""
         now = datetime.utcnow()
-        expired = [code for code, inv in self.invites.items() if inv.expires_at < now]
-        for code in expired:
-            del self.invites[code]
-        return len(expired)
+        heap = self._expiry_heap
+        removed = 0
+        while heap and heap[0][0] < now:
+            _, code = heapq.heappop(heap)
+            invite = self.invites.get(code)
+            if invite is not None and invite.expires_at < now:
+                del self.invites[code]
+                removed += 1
+        return removed
 
     def revoke_invite(self, code: str) -> bool:
         """Revoke an invite. Returns True if found and removed."""
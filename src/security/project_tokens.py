@@ -2,8 +2,9 @@
 
 import jwt
 import os
+import sys
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import Dict, Any, Optional, Sequence, Tuple
 
 
 # In production, load from environment or secrets manager
@@ -15,7 +16,7 @@ def generate_project_token(
     project_id: str,
     agent_id: str,
     repo_id: str,
-    permissions: List[str],
+    permissions: Sequence[str],
     expires_in_hours: int = 24,
 ) -> str:
     """
@@ -31,13 +32,14 @@ def generate_project_token(
     Returns:
         Encoded JWT string
     """
+    now = datetime.utcnow()
     payload = {
         "sub": agent_id,
         "project_id": project_id,
         "repo_id": repo_id,
-        "permissions": permissions,
-        "iat": datetime.utcnow(),
-        "exp": datetime.utcnow() + timedelta(hours=expires_in_hours),
+        "permissions": list(permissions),
+        "iat": now,
+        "exp": now + timedelta(hours=expires_in_hours),
     }
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
@@ -62,6 +64,7 @@ def validate_project_token(token: str, project_id: str) -> Dict[str, Any]:
         if payload.get("project_id") != project_id:
             raise ValueError("Token not valid for this project")
 
+        payload["permissions"] = _intern_permissions(payload.get("permissions", ()))
         return payload
 
     except jwt.ExpiredSignatureError:
@@ -70,25 +73,32 @@ def validate_project_token(token: str, project_id: str) -> Dict[str, Any]:
         raise ValueError(f"Invalid token: {e}")
 
 
-def get_permissions_from_token(token: str) -> List[str]:
+def get_permissions_from_token(token: str) -> Tuple[str, ...]:
     """Extract permissions from a token without full validation."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("permissions", [])
+        return _intern_permissions(payload.get("permissions", ()))
     except jwt.InvalidTokenError:
-        return []
+        return ()
 
 
-# Standard permission sets
-PERMISSIONS_READ_ONLY = ["project:read"]
-PERMISSIONS_CONTRIBUTOR = [
+def _intern_permissions(permissions: Sequence[str]) -> Tuple[str, ...]:
+    """Intern decoded permission strings so they share the constants' objects."""
+    return tuple(sys.intern(p) for p in permissions)
+
+
+# Standard permission sets (immutable; strings interned to match decoded tokens)
+PERMISSIONS_READ_ONLY = _intern_permissions((
+    "project:read",
+))
+PERMISSIONS_CONTRIBUTOR = _intern_permissions((
     "project:read",
     "contract:propose",
     "contract:respond",
     "context:share",
     "implementation:update",
-]
-PERMISSIONS_FULL = [
+))
+PERMISSIONS_FULL = _intern_permissions((
     "project:read",
     "project:write",
     "contract:propose",
@@ -96,4 +106,4 @@ PERMISSIONS_FULL = [
     "context:share",
     "implementation:update",
     "file:share",
-]
+))
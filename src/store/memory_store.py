@@ -1,5 +1,6 @@
 from typing import Dict, Optional, List
 from datetime import datetime
+import bisect
 from pathlib import Path
 import json
 
@@ -21,6 +22,11 @@ class MemoryStore:
         self.projects: Dict[str, Project] = {}
         self.persist_path = Path(persist_path) if persist_path else None
 
+        # Id lookups into each project's contracts and context_history,
+        # kept in step with the lists by every write below
+        self._contract_index: Dict[str, Dict[str, Contract]] = {}
+        self._packet_index: Dict[str, Dict[str, ContextPacket]] = {}
+
         if self.persist_path and self.persist_path.exists():
             self._load()
 
@@ -28,6 +34,7 @@ class MemoryStore:
 
     def create_project(self, project: Project) -> Project:
         self.projects[project.project_id] = project
+        self._index_project(project)
         self._save()
         return project
 
@@ -35,7 +42,17 @@ class MemoryStore:
         return self.projects.get(project_id)
 
     def update_project(self, project: Project) -> Project:
-        project.updated_at = datetime.utcnow()
+        # The caller may have changed the lists directly, so rebuild its index
+        self._index_project(project)
+        return self._commit_project(project, datetime.utcnow())
+
+    def _index_project(self, project: Project):
+        self._contract_index[project.project_id] = {c.contract_id: c for c in project.contracts}
+        self._packet_index[project.project_id] = {p.packet_id: p for p in project.context_history}
+
+    def _commit_project(self, project: Project, now: datetime) -> Project:
+        """Store a modified project, stamping it with an already-captured time."""
+        project.updated_at = now
         self.projects[project.project_id] = project
         self._save()
         return project
@@ -46,6 +63,8 @@ class MemoryStore:
     def delete_project(self, project_id: str) -> bool:
         if project_id in self.projects:
             del self.projects[project_id]
+            self._contract_index.pop(project_id, None)
+            self._packet_index.pop(project_id, None)
             self._save()
             return True
         return False
@@ -57,26 +76,27 @@ class MemoryStore:
         if not project:
             raise ValueError(f"Project {project_id} not found")
         project.contracts.append(contract)
-        self.update_project(project)
+        self._contract_index[project_id][contract.contract_id] = contract
+        self._commit_project(project, datetime.utcnow())
         return contract
 
     def get_contract(self, project_id: str, contract_id: str) -> Optional[Contract]:
-        project = self.get_project(project_id)
-        if not project:
-            return None
-        return project.get_contract_by_id(contract_id)
+        contracts = self._contract_index.get(project_id)
+        return contracts.get(contract_id) if contracts else None
 
     def update_contract(self, project_id: str, contract: Contract) -> Contract:
         project = self.get_project(project_id)
         if not project:
             raise ValueError(f"Project {project_id} not found")
 
-        contract.updated_at = datetime.utcnow()
+        now = datetime.utcnow()
+        contract.updated_at = now
         project.contracts = [
             c if c.contract_id != contract.contract_id else contract
             for c in project.contracts
         ]
-        self.update_project(project)
+        self._contract_index[project_id][contract.contract_id] = contract
+        self._commit_project(project, now)
         return contract
 
     def list_contracts(self, project_id: str) -> List[Contract]:
@@ -91,18 +111,27 @@ class MemoryStore:
         project = self.get_project(project_id)
         if not project:
             raise ValueError(f"Project {project_id} not found")
-        project.context_history.append(packet)
-        self.update_project(project)
+        self._insert_packet(project, packet)
+        self._packet_index[project_id][packet.packet_id] = packet
+        self._commit_project(project, datetime.utcnow())
         return packet
 
+    def _insert_packet(self, project: Project, packet: ContextPacket):
+        """
+        Put packet into context_history, which is kept in timestamp order.
+
+        Peers' packets arrive in delivery order but keep their sender's
+        timestamps, so they may belong before packets we already hold.
+        """
+        history = project.context_history
+        if not history or history[-1].timestamp <= packet.timestamp:
+            history.append(packet)
+        else:
+            bisect.insort(history, packet, key=lambda p: p.timestamp)
+
     def get_context(self, project_id: str, packet_id: str) -> Optional[ContextPacket]:
-        project = self.get_project(project_id)
-        if not project:
-            return None
-        return next(
-            (p for p in project.context_history if p.packet_id == packet_id),
-            None
-        )
+        packets = self._packet_index.get(project_id)
+        return packets.get(packet_id) if packets else None
 
     def list_context(
         self,
@@ -139,13 +168,9 @@ class MemoryStore:
         if not root:
             return []
 
-        # Get all replies
+        # context_history is kept in timestamp order, so replies already are
         thread = [root]
-        replies = [p for p in project.context_history if p.reply_to == packet_id]
-        thread.extend(replies)
-
-        # Sort by timestamp
-        thread.sort(key=lambda p: p.timestamp)
+        thread.extend(p for p in project.context_history if p.reply_to == packet_id)
         return thread
 
     # --- Repo Operations ---
@@ -170,6 +195,71 @@ class MemoryStore:
         self.update_project(project)
         return repo
 
+    # --- Merging Peer State ---
+    # Syncs from peers are joined into local state rather than written over
+    # it: contracts are last-writer-wins (Contract.is_superseded_by), context
+    # packets and repos only ever get added. Applying a sync twice, or two
+    # syncs in either order, leaves the same state.
+
+    def merge_project(self, project: Project) -> str:
+        """Join a peer's project into the store. Returns created/updated/skipped."""
+        existing = self.get_project(project.project_id)
+        if existing is None:
+            self.create_project(project)
+            return "created"
+
+        changed = False
+        known_repos = {r.repo_id for r in existing.repos}
+        for repo in project.repos:
+            if repo.repo_id not in known_repos:
+                existing.repos.append(repo)
+                changed = True
+        for contract in project.contracts:
+            changed |= self._join_contract(existing, contract)
+        known_packets = {p.packet_id for p in existing.context_history}
+        for packet in project.context_history:
+            if packet.packet_id not in known_packets:
+                self._insert_packet(existing, packet)
+                changed = True
+
+        if not changed:
+            return "skipped"
+        self.update_project(existing)  # Reindexes the joined lists
+        return "updated"
+
+    def merge_contract(self, project_id: str, contract: Contract) -> str:
+        """
+        Join a peer's copy of a contract. Returns created/updated/skipped.
+
+        Unlike update_contract, the peer's updated_at is kept, so every
+        agent ends up with the same copy.
+        """
+        project = self.get_project(project_id)
+        if not project:
+            raise ValueError(f"Project {project_id} not found")
+
+        is_new = self.get_contract(project_id, contract.contract_id) is None
+        if not self._join_contract(project, contract):
+            return "skipped"
+        self._commit_project(project, datetime.utcnow())
+        return "created" if is_new else "updated"
+
+    def _join_contract(self, project: Project, contract: Contract) -> bool:
+        """Put contract into project if it is new or supersedes ours; True if it did."""
+        contracts = self._contract_index[project.project_id]
+        existing = contracts.get(contract.contract_id)
+        if existing is None:
+            project.contracts.append(contract)
+        elif existing.is_superseded_by(contract.version, contract.updated_at):
+            project.contracts = [
+                c if c.contract_id != contract.contract_id else contract
+                for c in project.contracts
+            ]
+        else:
+            return False
+        contracts[contract.contract_id] = contract
+        return True
+
     # --- Persistence ---
 
     def _save(self):
@@ -201,6 +291,7 @@ class MemoryStore:
                     ContextPacket(**p) for p in project_data.get("context_history", [])
                 ]
                 self.projects[pid] = Project(**project_data)
+                self._index_project(self.projects[pid])
         except Exception as e:
             print(f"Warning: Failed to load persisted state: {e}")
 
@@ -217,4 +308,6 @@ class MemoryStore:
     def clear(self):
         """Clear all data (useful for testing)."""
         self.projects = {}
+        self._contract_index = {}
+        self._packet_index = {}
         self._save()
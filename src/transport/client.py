@@ -1,8 +1,48 @@
 import httpx
 import uuid
+import weakref
+from importlib.util import find_spec
 from typing import Dict, Any, Optional, List
 import asyncio
 
+from src.transport import codec
+
+# HTTP/2 needs the optional `h2` package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = find_spec("h2") is not None
+
+SHARED_POOL_LIMITS = httpx.Limits(max_connections=256, max_keepalive_connections=64)
+
+# event loop -> client, shared by every CACPClient on that loop
+_shared_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_shared_client() -> httpx.AsyncClient:
+    """
+    Get the process-wide HTTP client for the running event loop.
+
+    All CACPClient instances share one connection pool, so clients talking
+    to the same agent reuse TCP/TLS connections. Timeouts are passed per
+    request. Connections are bound to an event loop, so each loop gets its
+    own client; close it with close_shared_client before the loop ends.
+    """
+    loop = asyncio.get_running_loop()
+    client = _shared_clients.get(loop)
+    if client is None or client.is_closed:
+        client = _shared_clients[loop] = httpx.AsyncClient(limits=SHARED_POOL_LIMITS, http2=HTTP2_AVAILABLE)
+    return client
+
+
+async def close_shared_client():
+    """Close the running loop's shared HTTP client (call on teardown)."""
+    client = _shared_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+def _clean(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop optional parameters that were not provided (None)."""
+    return {k: v for k, v in params.items() if v is not None}
+
 
 class CACPClient:
     """Client for communicating with CACP agents."""
@@ -27,6 +67,8 @@ class CACPClient:
         self.agent_id = agent_id
         self.api_key = api_key
         self.timeout = timeout
+        # Encoded `{"jsonrpc":"2.0","method":...,"params":` per method
+        self._prefix_cache: Dict[str, bytes] = {}
 
     def _get_headers(self) -> Dict[str, str]:
         """Build request headers."""
@@ -37,6 +79,14 @@ class CACPClient:
             headers["Authorization"] = f"Bearer {self.api_key}"
         return headers
 
+    def _envelope_prefix(self, method: str) -> bytes:
+        """Get the constant leading bytes of the JSON-RPC envelope for a method."""
+        prefix = self._prefix_cache.get(method)
+        if prefix is None:
+            prefix = b'{"jsonrpc":"2.0","method":' + codec.dumps(method) + b',"params":'
+            self._prefix_cache[method] = prefix
+        return prefix
+
     async def call(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         Make a JSON-RPC call to the agent.
@@ -52,21 +102,23 @@ class CACPClient:
             Exception: If the call fails or returns an error
         """
         request_id = str(uuid.uuid4())
-        payload = {
-            "jsonrpc": "2.0",
-            "method": method,
-            "params": params,
-            "id": request_id,
-        }
-
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                self.endpoint,
-                json=payload,
-                headers=self._get_headers(),
-            )
-            response.raise_for_status()
-            data = response.json()
+        # Only params and id vary per call; splice them into the cached prefix
+        body = b"".join((
+            self._envelope_prefix(method),
+            codec.dumps(params),
+            b',"id":"',
+            request_id.encode(),
+            b'"}',
+        ))
+
+        response = await get_shared_client().post(
+            self.endpoint,
+            content=body,
+            headers=self._get_headers(),
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        data = codec.loads(response.content)
 
         if "error" in data:
             error = data["error"]
@@ -76,27 +128,34 @@ class CACPClient:
 
     def call_sync(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Synchronous version of call()."""
-        return asyncio.run(self.call(method, params))
+        async def call_and_close() -> Dict[str, Any]:
+            # The loop ends with asyncio.run, so its connection pool must too
+            try:
+                return await self.call(method, params)
+            finally:
+                await close_shared_client()
+
+        return asyncio.run(call_and_close())
 
     async def get_agent_card(self) -> Dict[str, Any]:
         """Fetch the agent's card."""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(
-                f"{self.endpoint}/.well-known/agent.json",
-                headers=self._get_headers(),
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await get_shared_client().get(
+            f"{self.endpoint}/.well-known/agent.json",
+            headers=self._get_headers(),
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
 
     async def health_check(self) -> Dict[str, str]:
         """Check agent health."""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(
-                f"{self.endpoint}/health",
-                headers=self._get_headers(),
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await get_shared_client().get(
+            f"{self.endpoint}/health",
+            headers=self._get_headers(),
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
 
     # --- Project convenience methods ---
 
@@ -159,14 +218,12 @@ class CACPClient:
         comment: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Respond to a contract."""
-        params = {
+        return await self.call("cacp/contract/respond", _clean({
             "projectId": project_id,
             "contractId": contract_id,
             "action": action,
-        }
-        if comment:
-            params["comment"] = comment
-        return await self.call("cacp/contract/respond", params)
+            "comment": comment,
+        }))
 
     async def get_contract(
         self,
@@ -192,16 +249,13 @@ class CACPClient:
         reply_to: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Share a context packet."""
-        params = {
+        return await self.call("cacp/context/share", _clean({
             "projectId": project_id,
             "type": context_type,
             "content": content,
-        }
-        if related_contracts:
-            params["relatedContracts"] = related_contracts
-        if reply_to:
-            params["replyTo"] = reply_to
-        return await self.call("cacp/context/share", params)
+            "relatedContracts": related_contracts,
+            "replyTo": reply_to,
+        }))
 
     async def ask_question(
         self,
@@ -243,12 +297,12 @@ class CACPClient:
         limit: int = 50,
     ) -> Dict[str, Any]:
         """List context packets."""
-        params = {"projectId": project_id, "limit": limit}
-        if context_type:
-            params["type"] = context_type
-        if contract_id:
-            params["contractId"] = contract_id
-        return await self.call("cacp/context/list", params)
+        return await self.call("cacp/context/list", _clean({
+            "projectId": project_id,
+            "limit": limit,
+            "type": context_type,
+            "contractId": contract_id,
+        }))
 
     # --- Implementation convenience methods ---
 
@@ -276,16 +330,13 @@ class CACPClient:
         test_endpoint: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Complete an implementation."""
-        params = {
+        return await self.call("cacp/implementation/complete", _clean({
             "projectId": project_id,
             "contractId": contract_id,
             "files": files,
-        }
-        if notes:
-            params["notes"] = notes
-        if test_endpoint:
-            params["testEndpoint"] = test_endpoint
-        return await self.call("cacp/implementation/complete", params)
+            "notes": notes,
+            "testEndpoint": test_endpoint,
+        }))
 
     async def verify_implementation(
         self,
@@ -295,11 +346,9 @@ class CACPClient:
         notes: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Verify an implementation."""
-        params = {
+        return await self.call("cacp/implementation/verify", _clean({
             "projectId": project_id,
             "contractId": contract_id,
             "result": result,
-        }
-        if notes:
-            params["notes"] = notes
-        return await self.call("cacp/implementation/verify", params)
+            "notes": notes,
+        }))
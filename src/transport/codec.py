@@ -0,0 +1,102 @@
+"""
+JSON encoding for CACP transport.
+
+Uses orjson when it is installed and falls back to the stdlib json module
+otherwise. Both paths produce compact UTF-8 bytes and accept str or bytes
+on decode, so callers can pass the result straight to httpx `content=`.
+
+Values that are already JSON (e.g. Pydantic's own serializer output) can
+be wrapped in RawJSON and embedded as-is by dumps_params.
+
+Peer-to-peer requests may also use MessagePack when the optional ormsgpack
+package is installed on both ends (see MSGPACK_AVAILABLE).
+"""
+
+import json
+from datetime import date, datetime
+from typing import Any, Mapping, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+try:
+    import ormsgpack
+except ImportError:
+    ormsgpack = None
+
+# MessagePack needs the optional `ormsgpack` package (pip install ormsgpack)
+MSGPACK_AVAILABLE = ormsgpack is not None
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+
+# Raised by the encoders below for params they cannot encode: TypeError for
+# unsupported values, ValueError for malformed RawJSON, RuntimeError for
+# MessagePack without ormsgpack
+ENCODE_ERRORS = (TypeError, ValueError, RuntimeError)
+
+
+class RawJSON(bytes):
+    """Encoded JSON value that dumps_params embeds without re-encoding."""
+
+    __slots__ = ()
+
+
+def _default(obj: Any) -> Any:
+    """Serialize types orjson handles natively but stdlib json does not."""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode an object as compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_default).encode()
+
+
+def dumps_params(params: Mapping[str, Any]) -> bytes:
+    """
+    Encode a params object whose top-level values may be RawJSON.
+
+    RawJSON values are spliced in verbatim; everything else goes through
+    dumps. Without any RawJSON values this is the same as dumps(params).
+    """
+    if not any(isinstance(value, RawJSON) for value in params.values()):
+        return dumps(params)
+    return b"{" + b",".join(
+        dumps(key) + b":" + (value if isinstance(value, RawJSON) else dumps(value))
+        for key, value in params.items()
+    ) + b"}"
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Decode JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = bytes(data)
+    return json.loads(data)
+
+
+def decode_raw_params(params: Mapping[str, Any]) -> Mapping[str, Any]:
+    """Return params with top-level RawJSON values decoded, for non-JSON encoders."""
+    if not any(isinstance(value, RawJSON) for value in params.values()):
+        return params
+    # orjson < 3.9 rejects bytes subclasses, so decode a plain bytes copy
+    return {key: loads(bytes(value)) if isinstance(value, RawJSON) else value for key, value in params.items()}
+
+
+def packb(obj: Any) -> bytes:
+    """Encode an object as MessagePack. Raises RuntimeError without ormsgpack."""
+    if ormsgpack is None:
+        raise RuntimeError("MessagePack support requires ormsgpack")
+    return ormsgpack.packb(obj)
+
+
+def unpackb(data: Union[bytes, bytearray, memoryview]) -> Any:
+    """Decode MessagePack bytes. Raises RuntimeError without ormsgpack."""
+    if ormsgpack is None:
+        raise RuntimeError("MessagePack support requires ormsgpack")
+    return ormsgpack.unpackb(data)
@@ -12,30 +12,129 @@ Peers can be discovered via:
 
 import asyncio
 import httpx
+import itertools
 import logging
-from typing import Dict, List, Optional, Any, TYPE_CHECKING
+import time
+import weakref
+from typing import Any, Awaitable, Dict, Hashable, List, Optional, Set, Tuple, TYPE_CHECKING
 from dataclasses import dataclass, field
 from datetime import datetime
 
+from src.transport import codec
+from src.transport.client import HTTP2_AVAILABLE
+
 if TYPE_CHECKING:
     from src.adp import ADPClient
 
 logger = logging.getLogger(__name__)
 
+# Sized for broadcast fan-out: keep sockets to every peer warm between syncs
+PEER_POOL_LIMITS = httpx.Limits(
+    max_connections=256,
+    max_keepalive_connections=128,
+    keepalive_expiry=60.0,
+)
+
+# Seconds to wait for a TCP connection to a peer; a down peer fails fast
+# instead of holding a broadcast slot for the whole request timeout
+PEER_CONNECT_TIMEOUT = 0.5
+
+# How long ADP discovery results are reused before asking the exchange again
+ADP_CACHE_TTL = 60.0
+
+# Backoff after a failed call: BACKOFF_BASE * 2**failures, capped at BACKOFF_MAX
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 60.0
+
+# Request bodies above this size are streamed in chunks to peers that accept it
+STREAM_THRESHOLD = 256 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+async def _iter_chunks(body: bytes):
+    """Yield body in STREAM_CHUNK_SIZE pieces for a chunked request."""
+    view = memoryview(body)
+    for start in range(0, len(view), STREAM_CHUNK_SIZE):
+        yield bytes(view[start:start + STREAM_CHUNK_SIZE])
+
+
+# event loop -> {(timeout, connect_timeout): client}, shared by every PeerRegistry on that loop
+_shared_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+# event loop -> WeakSet of the registries using its shared clients; the last
+# one to close() closes the clients
+_shared_users: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_shared_peer_client(timeout: float, connect_timeout: float = PEER_CONNECT_TIMEOUT) -> httpx.AsyncClient:
+    """
+    Get the process-wide peer client for a timeout on the running event loop.
+
+    Every PeerRegistry on the same loop shares these clients, so registries
+    talking to the same peers reuse one connection pool. Connections are
+    bound to an event loop, so each loop gets its own set of clients.
+    """
+    clients = _shared_clients.setdefault(asyncio.get_running_loop(), {})
+    key = (timeout, connect_timeout)
+    client = clients.get(key)
+    if client is None or client.is_closed:
+        client = clients[key] = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=min(connect_timeout, timeout)),
+            limits=PEER_POOL_LIMITS,
+            http2=HTTP2_AVAILABLE,
+        )
+    return client
+
+
+async def close_shared_peer_clients():
+    """Close the running loop's shared peer clients, whoever still uses them."""
+    loop = asyncio.get_running_loop()
+    for registry in _shared_users.pop(loop, ()):
+        # Their cached client is about to close; the next call fetches a new one
+        registry._http_client = None
+    clients = _shared_clients.pop(loop, {})
+    for client in clients.values():
+        if not client.is_closed:
+            await client.aclose()
+
+
+def _assemble_results(peer_ids: List[str], responses: List[Any]) -> Dict[str, Any]:
+    """
+    Pair broadcast responses with their peer ids.
+
+    Failed calls (None or an exception) become {"error": ...} entries.
+    Most calls succeed, so the dict is built in one pass by zip and only
+    the failures are rewritten.
+    """
+    results = dict(zip(peer_ids, responses))
+    for agent_id, response in results.items():
+        if response is None:
+            results[agent_id] = {"error": "No response"}
+        elif isinstance(response, BaseException):
+            results[agent_id] = {"error": str(response)}
+    return results
+
 
-@dataclass
+@dataclass(slots=True)
 class Peer:
     """Represents a known peer agent."""
     agent_id: str  # AID format: aid://domain.com/name@version
     endpoint: str
     repo_name: Optional[str] = None
-    last_seen: datetime = field(default_factory=datetime.utcnow)
+    last_seen: float = field(default_factory=time.time)  # Unix timestamp
     is_healthy: bool = True
     failed_attempts: int = 0
+    not_before: float = 0.0  # time.monotonic() before which broadcasts skip this peer
+    streaming: bool = False  # Peer accepts chunked request bodies (agent card)
+    msgpack: bool = False  # Requests to this peer are MessagePack (both sides support it)
     verified: bool = False  # True if verified via ADP
     role: Optional[str] = None
     languages: Optional[List[str]] = None
 
+    @property
+    def last_seen_dt(self) -> datetime:
+        """last_seen as a naive UTC datetime."""
+        return datetime.utcfromtimestamp(self.last_seen)
+
 
 class PeerRegistry:
     """
@@ -53,24 +152,124 @@ class PeerRegistry:
         self_endpoint: str,
         timeout: float = 10.0,
         adp_client: Optional["ADPClient"] = None,
+        batch_window: float = 0.0,
+        max_concurrency: int = 32,
+        broadcast_timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
     ):
+        """
+        Args:
+            self_agent_id: This agent's ID (sent as X-Agent-ID)
+            self_endpoint: This agent's endpoint (sent as X-Source-Endpoint)
+            timeout: Per-request timeout in seconds
+            adp_client: Optional ADP client for discovery
+            batch_window: Seconds to coalesce broadcasts into one JSON-RPC
+                batch per peer. 0 disables batching (every broadcast is sent
+                immediately).
+            max_concurrency: Most broadcast calls in flight at once. Lower
+                values smooth bursts at the cost of tail latency on large
+                fan-outs; keep it at or below PEER_POOL_LIMITS.max_connections.
+            broadcast_timeout: Seconds a broadcast waits on any one peer before
+                counting it as failed. None waits up to the request timeout.
+            connect_timeout: Seconds to wait for a connection to a peer
+                (capped at timeout). None uses PEER_CONNECT_TIMEOUT.
+            http_client: Client to use instead of the shared per-loop pool.
+                The registry takes ownership and closes it in close().
+        """
         self.self_agent_id = self_agent_id
         self.self_endpoint = self_endpoint
         self.timeout = timeout
         self.adp = adp_client
+        self.batch_window = batch_window
+        self.max_concurrency = max_concurrency
+        self.broadcast_timeout = broadcast_timeout
+        self.connect_timeout = PEER_CONNECT_TIMEOUT if connect_timeout is None else connect_timeout
         self.peers: Dict[str, Peer] = {}
-        self._http_client: Optional[httpx.AsyncClient] = None
+        # Bumped whenever membership or health changes, for caching peer listings
+        self.version = 0
+        # Own client if given; by default registries share a module-level pool,
+        # whose client is cached here on first use (see _get_client)
+        self._http_client = http_client
+        self._owns_client = http_client is not None
+
+        # Indexes over self.peers, kept in step with Peer.is_healthy/verified
+        self._healthy: Set[str] = set()
+        self._verified: Set[str] = set()
+
+        # Request ids only need to be unique per sender, so a counter will do
+        self._id_prefix = f"{self_agent_id}-"
+        self._id_counter = itertools.count()
+        self._default_headers = {
+            "X-Agent-ID": self_agent_id,
+            "X-Source-Endpoint": self_endpoint,
+            "Content-Type": "application/json",
+        }
+        self._msgpack_headers = {**self._default_headers, "Content-Type": codec.MSGPACK_CONTENT_TYPE}
+
+        # ADP lookup caches: monotonic fetch time plus the agent_ids registered
+        self._discover_cache: Dict[Tuple[Optional[str], Tuple[str, ...]], Tuple[float, List[str]]] = {}
+        self._aid_cache: Dict[str, float] = {}
+        # endpoint -> (ETag, agent card), revalidated with If-None-Match
+        self._card_cache: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        # One lock per lookup key so concurrent misses share a single ADP call.
+        # Weak values: a lock goes away once no lookup holds or waits on it
+        self._adp_locks: "weakref.WeakValueDictionary[Hashable, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+        # Constant leading bytes of the JSON-RPC envelope, per method
+        self._prefix_cache: Dict[str, bytes] = {}
+
+        # Broadcast batching: per-peer queue of (method, params, result future)
+        self._outbox: Dict[str, List[Tuple[str, Dict[str, Any], asyncio.Future]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+        # Caps broadcast fan-out so it never outruns the connection pool
+        self._broadcast_sem = asyncio.Semaphore(max_concurrency)
 
     async def _get_client(self) -> httpx.AsyncClient:
-        """Get or create HTTP client."""
-        if self._http_client is None or self._http_client.is_closed:
-            self._http_client = httpx.AsyncClient(timeout=self.timeout)
-        return self._http_client
+        """Get the HTTP client (the shared pool unless one was set on this registry)."""
+        client = self._http_client
+        if client is not None:
+            return client
+        return self._attach_shared_client()
+
+    def _attach_shared_client(self) -> httpx.AsyncClient:
+        """
+        Join the running loop's shared pool and cache its client.
+
+        Like the broadcast semaphore, the cached client ties the registry
+        to the loop it first calls peers on. close_shared_peer_clients()
+        clears the cache of every registry using the pool it closes.
+        """
+        _shared_users.setdefault(asyncio.get_running_loop(), weakref.WeakSet()).add(self)
+        client = self._http_client = get_shared_peer_client(self.timeout, self.connect_timeout)
+        return client
 
     async def close(self):
-        """Close the HTTP client."""
-        if self._http_client and not self._http_client.is_closed:
-            await self._http_client.aclose()
+        """
+        Stop batching and close this registry's own HTTP client, if any.
+
+        The shared pool stays open while other registries on the loop still
+        use it; the last of them to close also closes the pool.
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        for entries in self._outbox.values():
+            for _, _, future in entries:
+                if not future.done():
+                    future.set_result(None)
+        self._outbox.clear()
+        client, self._http_client = self._http_client, None
+        if self._owns_client and client is not None and not client.is_closed:
+            await client.aclose()
+        self._owns_client = False
+
+        users = _shared_users.get(asyncio.get_running_loop())
+        if users is not None and self in users:
+            users.discard(self)
+            if not users:
+                await close_shared_peer_clients()
 
     # === Peer Registration ===
 
@@ -82,7 +281,9 @@ class PeerRegistry:
         verified: bool = False,
         role: Optional[str] = None,
         languages: Optional[List[str]] = None,
-    ):
+        streaming: bool = False,
+        msgpack: bool = False,
+    ) -> Optional[Peer]:
         """
         Register a peer agent manually.
 
@@ -93,25 +294,44 @@ class PeerRegistry:
             verified: Whether this peer is ADP-verified
             role: Agent role (backend, frontend, etc.)
             languages: Supported languages
+            streaming: Whether the peer accepts chunked request bodies
+            msgpack: Whether the peer accepts MessagePack requests (only used
+                if this agent has ormsgpack too)
+
+        Returns:
+            The registered Peer, or None if agent_id is this agent
         """
         if agent_id == self.self_agent_id:
-            return  # Don't register self
+            return None  # Don't register self
 
-        self.peers[agent_id] = Peer(
+        peer = self.peers[agent_id] = Peer(
             agent_id=agent_id,
             endpoint=endpoint.rstrip("/"),
             repo_name=repo_name,
             verified=verified,
             role=role,
             languages=languages,
+            streaming=streaming,
+            msgpack=msgpack and codec.MSGPACK_AVAILABLE,
         )
-        logger.info(f"Registered peer: {agent_id} at {endpoint} (verified={verified})")
+        self._healthy.add(agent_id)
+        self.version += 1
+        if verified:
+            self._verified.add(agent_id)
+        else:
+            self._verified.discard(agent_id)
+        logger.info("Registered peer: %s at %s (verified=%s)", agent_id, endpoint, verified)
+        return peer
 
     def unregister_peer(self, agent_id: str):
         """Remove a peer from the registry."""
         if agent_id in self.peers:
             del self.peers[agent_id]
-            logger.info(f"Unregistered peer: {agent_id}")
+            self._healthy.discard(agent_id)
+            self._verified.discard(agent_id)
+            self._invalidate_adp_cache(agent_id)
+            self.version += 1
+            logger.info("Unregistered peer: %s", agent_id)
 
     def get_peer(self, agent_id: str) -> Optional[Peer]:
         """Get a peer by ID."""
@@ -123,10 +343,44 @@ class PeerRegistry:
 
     def get_verified_peers(self) -> List[Peer]:
         """List only ADP-verified peers."""
-        return [p for p in self.peers.values() if p.verified]
+        return [self.peers[agent_id] for agent_id in self._verified]
+
+    def _mark_healthy(self, peer: Peer):
+        """Flag a peer healthy and include it in broadcasts."""
+        if not peer.is_healthy:
+            self.version += 1
+        peer.is_healthy = True
+        peer.not_before = 0.0
+        self._healthy.add(peer.agent_id)
+
+    def _mark_unhealthy(self, peer: Peer):
+        """Flag a peer unhealthy and drop it from broadcasts."""
+        if peer.is_healthy:
+            self.version += 1
+        peer.is_healthy = False
+        self._healthy.discard(peer.agent_id)
 
     # === ADP Discovery ===
 
+    def _adp_lock(self, key: Hashable) -> asyncio.Lock:
+        """Get the lock that serializes ADP lookups for one cache key."""
+        lock = self._adp_locks.get(key)
+        if lock is None:
+            lock = self._adp_locks[key] = asyncio.Lock()
+        return lock
+
+    def _invalidate_adp_cache(self, agent_id: str):
+        """Forget cached ADP results so the next lookup refetches this agent."""
+        self._aid_cache.pop(agent_id, None)
+        self._discover_cache.clear()
+
+    def _cached_discovery(self, key: Tuple[Optional[str], Tuple[str, ...]]) -> Optional[List[Peer]]:
+        """Return still-registered peers from a fresh discovery cache entry."""
+        cached = self._discover_cache.get(key)
+        if cached is None or time.monotonic() - cached[0] >= ADP_CACHE_TTL:
+            return None
+        return [self.peers[aid] for aid in cached[1] if aid in self.peers]
+
     async def discover_via_adp(
         self,
         role: Optional[str] = None,
@@ -146,28 +400,40 @@ class PeerRegistry:
             logger.warning("No ADP client configured - cannot discover via ADP")
             return []
 
-        logger.info(f"Discovering CACP agents via ADP (role={role}, languages={languages})")
+        key = (role, tuple(languages or ()))
+        cached = self._cached_discovery(key)
+        if cached is not None:
+            return cached
 
-        agents = await self.adp.search_cacp_agents(role=role, languages=languages)
+        async with self._adp_lock(("discover", key)):
+            # Another coroutine may have refilled the cache while we waited
+            cached = self._cached_discovery(key)
+            if cached is not None:
+                return cached
 
-        discovered = []
-        for agent in agents:
-            if agent.aid == self.self_agent_id:
-                continue  # Skip self
+            logger.info("Discovering CACP agents via ADP (role=%s, languages=%s)", role, languages)
 
-            if agent.endpoint:
-                self.register_peer(
-                    agent_id=agent.aid,
-                    endpoint=agent.endpoint,
-                    verified=agent.verified,
-                    role=agent.role,
-                    languages=agent.languages,
-                )
-                peer = self.peers.get(agent.aid)
-                if peer:
-                    discovered.append(peer)
+            agents = await self.adp.search_cacp_agents(role=role, languages=languages)
 
-        logger.info(f"Discovered {len(discovered)} peers via ADP")
+            discovered = []
+            for agent in agents:
+                if agent.aid == self.self_agent_id:
+                    continue  # Skip self
+
+                if agent.endpoint:
+                    peer = self.register_peer(
+                        agent_id=agent.aid,
+                        endpoint=agent.endpoint,
+                        verified=agent.verified,
+                        role=agent.role,
+                        languages=agent.languages,
+                    )
+                    if peer:
+                        discovered.append(peer)
+
+            self._discover_cache[key] = (time.monotonic(), [p.agent_id for p in discovered])
+
+        logger.info("Discovered %d peers via ADP", len(discovered))
         return discovered
 
     async def add_peer_by_aid(self, aid: str) -> Optional[Peer]:
@@ -184,12 +450,56 @@ class PeerRegistry:
             logger.warning("No ADP client configured - cannot fetch by AID")
             return None
 
+        peer = self._cached_aid(aid)
+        if peer is not None:
+            return peer
+
+        async with self._adp_lock(("aid", aid)):
+            peer = self._cached_aid(aid)
+            if peer is not None:
+                return peer
+            return await self._fetch_peer_by_aid(aid)
+
+    async def add_peers_by_aids(self, aids: List[str]) -> List[Optional[Peer]]:
+        """
+        Add several peers by AID, fetching them from ADP concurrently.
+
+        Prefer this over looping on add_peer_by_aid when resolving more
+        than a handful of AIDs: the lookups overlap instead of queueing.
+
+        Args:
+            aids: Agent IDs to resolve
+
+        Returns:
+            Peer (or None if not found) for each AID, in the same order
+        """
+        results = await asyncio.gather(
+            *(self.add_peer_by_aid(aid) for aid in aids),
+            return_exceptions=True,
+        )
+        peers: List[Optional[Peer]] = []
+        for aid, result in zip(aids, results):
+            if isinstance(result, Exception):
+                logger.warning("Failed to add peer %s: %s", aid, result)
+                result = None
+            peers.append(result)
+        return peers
+
+    def _cached_aid(self, aid: str) -> Optional[Peer]:
+        """Return the registered peer for an AID fetched within the TTL."""
+        fetched_at = self._aid_cache.get(aid)
+        if fetched_at is None or time.monotonic() - fetched_at >= ADP_CACHE_TTL:
+            return None
+        return self.peers.get(aid)
+
+    async def _fetch_peer_by_aid(self, aid: str) -> Optional[Peer]:
+        """Fetch an agent from ADP and register it as a peer."""
         try:
             agent_data = await self.adp.get_agent(aid)
             endpoint = self.adp.get_cacp_endpoint(agent_data)
 
             if not endpoint:
-                logger.warning(f"Agent {aid} has no CACP endpoint")
+                logger.warning("Agent %s has no CACP endpoint", aid)
                 return None
 
             # Extract metadata
@@ -197,7 +507,7 @@ class PeerRegistry:
             metadata = manifest.get("metadata", {})
             cacp_meta = metadata.get("cacp", {})
 
-            self.register_peer(
+            peer = self.register_peer(
                 agent_id=aid,
                 endpoint=endpoint,
                 verified=agent_data.get("verified", False),
@@ -205,10 +515,11 @@ class PeerRegistry:
                 languages=cacp_meta.get("languages"),
             )
 
-            return self.peers.get(aid)
+            self._aid_cache[aid] = time.monotonic()
+            return peer
 
         except ValueError as e:
-            logger.warning(f"Failed to add peer by AID: {e}")
+            logger.warning("Failed to add peer by AID: %s", e)
             return None
 
     # === Direct Discovery (without ADP) ===
@@ -225,33 +536,94 @@ class PeerRegistry:
         Returns:
             Peer if discovery successful, None otherwise
         """
+        endpoint = endpoint.rstrip("/")
         try:
-            client = await self._get_client()
-            response = await client.get(f"{endpoint.rstrip('/')}/.well-known/agent.json")
-            response.raise_for_status()
-            card = response.json()
+            card = await self._fetch_agent_card(endpoint)
 
             agent_id = card.get("extensions", {}).get("cacp", {}).get("agentId")
             repo_name = card.get("extensions", {}).get("cacp", {}).get("repo")
             role = card.get("extensions", {}).get("cacp", {}).get("role")
             language = card.get("extensions", {}).get("cacp", {}).get("language")
+            streaming = card.get("extensions", {}).get("cacp", {}).get("streamingRequests", False)
+            msgpack = card.get("extensions", {}).get("cacp", {}).get("msgpack", False)
 
             if agent_id:
-                self.register_peer(
+                return self.register_peer(
                     agent_id=agent_id,
                     endpoint=endpoint,
                     repo_name=repo_name,
                     verified=False,  # Not ADP-verified
                     role=role,
                     languages=[language] if language else None,
+                    streaming=streaming,
+                    msgpack=msgpack,
                 )
-                return self.peers.get(agent_id)
 
         except Exception as e:
-            logger.warning(f"Failed to discover peer at {endpoint}: {e}")
+            logger.warning("Failed to discover peer at %s: %s", endpoint, e)
 
         return None
 
+    async def register_with(self, endpoint: str, repo_name: Optional[str] = None) -> Optional[Peer]:
+        """
+        Register this agent with a peer and add the peer from its reply.
+
+        Takes one round trip: the peer returns its announce payload inline
+        instead of calling back.
+
+        Args:
+            endpoint: The peer's HTTP endpoint
+            repo_name: Name of the repo this agent manages
+
+        Returns:
+            Peer if registration succeeded, None otherwise
+        """
+        endpoint = endpoint.rstrip("/")
+        try:
+            client = await self._get_client()
+            response = await client.post(
+                f"{endpoint}/peers/register",
+                content=codec.dumps({
+                    "agentId": self.self_agent_id,
+                    "endpoint": self.self_endpoint,
+                    "repoName": repo_name,
+                    "reciprocal": False,
+                    "msgpack": codec.MSGPACK_AVAILABLE,
+                }),
+                headers={**self._default_headers, "X-CACP-Inline-Announce": "1"},
+            )
+            response.raise_for_status()
+            announce = codec.loads(response.content)["announce"]
+            # Keep the endpoint we reached; the peer may only know itself as localhost
+            return self.register_peer(
+                agent_id=announce["agentId"],
+                endpoint=endpoint,
+                repo_name=announce.get("repoName"),
+                msgpack=announce.get("msgpack", False),
+            )
+        except Exception as e:
+            logger.warning("Failed to register with peer at %s: %s", endpoint, e)
+            return None
+
+    async def _fetch_agent_card(self, endpoint: str) -> Dict[str, Any]:
+        """GET a peer's agent card, reusing the cached copy on 304 Not Modified."""
+        cached = self._card_cache.get(endpoint)
+        headers = {"If-None-Match": cached[0]} if cached else None
+
+        client = await self._get_client()
+        response = await client.get(f"{endpoint}/.well-known/agent.json", headers=headers)
+        if response.status_code == 304 and cached:
+            return cached[1]
+        response.raise_for_status()
+        card = codec.loads(response.content)
+
+        etag = response.headers.get("etag")
+        if etag:
+            self._card_cache[endpoint] = (etag, card)
+        else:
+            self._card_cache.pop(endpoint, None)
+        return card
+
     # === Communication ===
 
     async def call_peer(self, peer: Peer, method: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -267,103 +639,381 @@ class PeerRegistry:
             Result dict if successful, None if failed
         """
         try:
-            client = await self._get_client()
-            response = await client.post(
-                peer.endpoint,
-                json={
-                    "jsonrpc": "2.0",
-                    "method": method,
-                    "params": params,
-                    "id": f"{self.self_agent_id}-{datetime.utcnow().timestamp()}",
-                },
-                headers={
-                    "X-Agent-ID": self.self_agent_id,
-                    "X-Source-Endpoint": self.self_endpoint,
-                }
-            )
-            response.raise_for_status()
-            data = response.json()
+            body = self._encode_call(method, params, msgpack=peer.msgpack)
+        except codec.ENCODE_ERRORS as e:
+            logger.warning("Cannot encode %s for peer %s: %s", method, peer.agent_id, e)
+            return None
+        return await self._call_encoded(peer, body)
+
+    def _encode_call(
+        self,
+        method: str,
+        params: Dict[str, Any],
+        request_id: Optional[str] = None,
+        msgpack: bool = False,
+    ) -> bytes:
+        """
+        Encode a JSON-RPC request, with a fresh id unless one is given.
+
+        Only params are serialized per call; the envelope up to them is
+        built once per method and reused. Top-level codec.RawJSON params
+        are embedded without re-encoding. With msgpack the request is
+        encoded as MessagePack instead, for peers with Peer.msgpack set.
+
+        Raises one of codec.ENCODE_ERRORS if params cannot be encoded.
+        """
+        if msgpack:
+            return codec.packb(self._request_object(method, params, request_id))
+        prefix = self._prefix_cache.get(method)
+        if prefix is None:
+            prefix = b'{"jsonrpc":"2.0","method":' + codec.dumps(method) + b',"params":'
+            self._prefix_cache[method] = prefix
+        if request_id is None:
+            request_id = f"{self._id_prefix}{next(self._id_counter)}"
+        return b"".join((prefix, codec.dumps_params(params), b',"id":"', request_id.encode(), b'"}'))
+
+    def _request_object(self, method: str, params: Dict[str, Any], request_id: Optional[str] = None) -> Dict[str, Any]:
+        """Build a JSON-RPC request as a plain object, for non-JSON encodings."""
+        if request_id is None:
+            request_id = f"{self._id_prefix}{next(self._id_counter)}"
+        return {"jsonrpc": "2.0", "method": method, "params": codec.decode_raw_params(params), "id": request_id}
+
+    async def _call_encoded(self, peer: Peer, body: bytes) -> Optional[Dict[str, Any]]:
+        """Send a body from _encode_call and record the outcome on the peer."""
+        try:
+            data = await self._post(peer, body)
 
             if "error" in data:
-                logger.warning(f"Peer {peer.agent_id} returned error: {data['error']}")
+                logger.warning("Peer %s returned error: %s", peer.agent_id, data["error"])
                 return None
 
-            peer.last_seen = datetime.utcnow()
-            peer.is_healthy = True
-            peer.failed_attempts = 0
-
+            self._record_success(peer)
             return data.get("result")
 
         except Exception as e:
-            logger.warning(f"Failed to call peer {peer.agent_id}: {e}")
-            peer.failed_attempts += 1
-            if peer.failed_attempts >= 3:
-                peer.is_healthy = False
+            self._record_failure(peer, e)
+            return None
+
+    async def call_peer_batch(
+        self,
+        peer: Peer,
+        calls: List[Tuple[str, Dict[str, Any]]],
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Send several JSON-RPC calls to a peer as one batch request.
+
+        Args:
+            peer: The peer to call
+            calls: (method, params) pairs, applied by the peer in order
+
+        Returns:
+            Result per call, in the same order (None for calls that failed).
+            A call whose params cannot be encoded fails on its own; it is
+            left out of the batch and not counted against the peer.
+        """
+        ids = [f"{self._id_prefix}{next(self._id_counter)}" for _ in calls]
+        body = self._encode_batch(peer, ids, calls)
+        if body is None:
+            return [None] * len(calls)
+        try:
+            data = await self._post(peer, body)
+        except Exception as e:
+            self._record_failure(peer, e)
+            return [None] * len(calls)
+
+        self._record_success(peer)
+
+        # Replies we can't match to a request (non-objects, odd ids) count as failed calls
+        by_id: Dict[str, Dict[str, Any]] = {}
+        if isinstance(data, list):
+            for item in data:
+                if isinstance(item, dict) and isinstance(item.get("id"), str):
+                    by_id[item["id"]] = item
+        results: List[Optional[Dict[str, Any]]] = []
+        for request_id in ids:
+            item = by_id.get(request_id)
+            if item is None or "error" in item:
+                logger.warning("Peer %s batch call failed: %s", peer.agent_id, item and item.get("error"))
+                results.append(None)
+            else:
+                results.append(item.get("result"))
+        return results
+
+    def _encode_batch(
+        self,
+        peer: Peer,
+        ids: List[str],
+        calls: List[Tuple[str, Dict[str, Any]]],
+    ) -> Optional[bytes]:
+        """
+        Encode the calls that can be encoded as one batch body, or None if none can.
+
+        Calls left out get no response, so call_peer_batch reports them as failed.
+        """
+        requests = []
+        for request_id, (method, params) in zip(ids, calls):
+            try:
+                if peer.msgpack:
+                    request = self._request_object(method, params, request_id)
+                    codec.packb(request)  # Only to find out whether it encodes
+                else:
+                    request = self._encode_call(method, params, request_id)
+            except codec.ENCODE_ERRORS as e:
+                logger.warning("Cannot encode %s for peer %s: %s", method, peer.agent_id, e)
+                continue
+            requests.append(request)
+
+        if not requests:
             return None
+        if peer.msgpack:
+            return codec.packb(requests)
+        return b"[" + b",".join(requests) + b"]"
+
+    async def _post(self, peer: Peer, body: bytes) -> Any:
+        """
+        POST an encoded JSON-RPC body to a peer and decode the reply.
 
-    async def broadcast(self, method: str, params: Dict[str, Any], exclude: Optional[List[str]] = None) -> Dict[str, Any]:
+        The body must be MessagePack for peers with Peer.msgpack set and
+        JSON otherwise; replies are always JSON.
+        """
+        client = await self._get_client()
+        headers = self._msgpack_headers if peer.msgpack else self._default_headers
+        if peer.streaming and len(body) > STREAM_THRESHOLD:
+            # Chunked upload: httpx doesn't have to stage the whole body per request
+            async with client.stream(
+                "POST", peer.endpoint, content=_iter_chunks(body), headers=headers,
+            ) as response:
+                response.raise_for_status()
+                return codec.loads(await response.aread())
+
+        response = await client.post(peer.endpoint, content=body, headers=headers)
+        response.raise_for_status()
+        return codec.loads(response.content)
+
+    def _record_success(self, peer: Peer):
+        """Reset a peer's failure state after a successful call."""
+        peer.last_seen = time.time()
+        peer.failed_attempts = 0
+        self._mark_healthy(peer)
+
+    def _record_failure(self, peer: Peer, error: Exception):
+        """
+        Count a failed call and back the peer off.
+
+        Broadcasts skip the peer until the backoff expires, so a flaky peer
+        costs one timeout per backoff period rather than one per broadcast.
+        Three failures in a row also mark it unhealthy.
+        """
+        logger.warning("Failed to call peer %s: %s", peer.agent_id, error)
+        peer.failed_attempts += 1
+        peer.not_before = time.monotonic() + min(BACKOFF_BASE * 2 ** peer.failed_attempts, BACKOFF_MAX)
+        if peer.failed_attempts >= 3:
+            self._mark_unhealthy(peer)
+            self._invalidate_adp_cache(peer.agent_id)
+
+    async def broadcast(
+        self,
+        method: str,
+        params: Dict[str, Any],
+        exclude: Optional[List[str]] = None,
+        immediate: bool = False,
+    ) -> Dict[str, Any]:
         """
         Broadcast a message to all healthy peers.
 
+        When batch_window is set, the message is queued and sent together
+        with any other broadcasts made within the window, as one JSON-RPC
+        batch per peer. Results are still returned per call.
+
         Args:
             method: JSON-RPC method name
             params: Method parameters
             exclude: List of agent_ids to exclude from broadcast
+            immediate: Send now even if batching is enabled
 
         Returns:
             Dict mapping agent_id to result (or error message)
         """
-        exclude = exclude or []
-        results = {}
-
-        # Get healthy peers
-        peers_to_call = [
-            p for p in self.peers.values()
-            if p.is_healthy and p.agent_id not in exclude
-        ]
-
+        peers_to_call = self._broadcast_targets(exclude)
         if not peers_to_call:
-            return results
+            return {}
 
         # Call all peers concurrently
-        tasks = [
-            self.call_peer(peer, method, params)
-            for peer in peers_to_call
-        ]
+        if self.batch_window > 0 and not immediate:
+            tasks = [self._enqueue(peer, method, params) for peer in peers_to_call]
+        else:
+            try:
+                bodies = self._encode_broadcast(method, params, peers_to_call)
+            except codec.ENCODE_ERRORS as e:
+                logger.warning("Cannot encode %s for broadcast: %s", method, e)
+                return {peer.agent_id: {"error": str(e)} for peer in peers_to_call}
+            tasks = [
+                self._guarded_call(peer, bodies[peer.msgpack])
+                for peer in peers_to_call
+            ]
 
         responses = await asyncio.gather(*tasks, return_exceptions=True)
+        return _assemble_results([peer.agent_id for peer in peers_to_call], responses)
 
-        for peer, response in zip(peers_to_call, responses):
-            if isinstance(response, Exception):
-                results[peer.agent_id] = {"error": str(response)}
-            elif response is None:
-                results[peer.agent_id] = {"error": "No response"}
-            else:
-                results[peer.agent_id] = response
+    async def broadcast_quorum(
+        self,
+        method: str,
+        params: Dict[str, Any],
+        quorum: int,
+        exclude: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Broadcast to all healthy peers, returning once `quorum` have answered.
+
+        Calls still in flight when the quorum is reached are cancelled, so
+        latency follows the quorum-th fastest peer rather than the slowest.
+
+        Args:
+            method: JSON-RPC method name
+            params: Method parameters
+            quorum: Number of successful responses to wait for
+            exclude: List of agent_ids to exclude from broadcast
+
+        Returns:
+            Dict mapping agent_id to result for the peers that answered
+            (fewer than quorum entries if not enough peers succeeded)
+        """
+        results: Dict[str, Any] = {}
+
+        peers_to_call = self._broadcast_targets(exclude)
+        if not peers_to_call or quorum <= 0:
+            return results
+
+        try:
+            bodies = self._encode_broadcast(method, params, peers_to_call)
+        except codec.ENCODE_ERRORS as e:
+            logger.warning("Cannot encode %s for broadcast: %s", method, e)
+            return results
+
+        async def tagged(peer: Peer) -> Tuple[Peer, Optional[Dict[str, Any]]]:
+            return peer, await self._guarded_call(peer, bodies[peer.msgpack])
+
+        tasks = [asyncio.ensure_future(tagged(peer)) for peer in peers_to_call]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                peer, response = await next_done
+                if response is not None:
+                    results[peer.agent_id] = response
+                    if len(results) >= quorum:
+                        break
+        finally:
+            for task in tasks:
+                task.cancel()
 
         return results
 
+    def _broadcast_targets(self, exclude: Optional[List[str]]) -> List[Peer]:
+        """Healthy peers not in exclude and not backing off."""
+        targets = self._healthy.difference(exclude) if exclude else self._healthy
+        now = time.monotonic()
+        peers_to_call = []
+        for agent_id in targets:
+            peer = self.peers[agent_id]
+            if peer.not_before <= now:
+                peers_to_call.append(peer)
+        return peers_to_call
+
+    def _encode_broadcast(self, method: str, params: Dict[str, Any], peers: List[Peer]) -> Dict[bool, bytes]:
+        """
+        Encode a broadcast once per encoding, keyed by Peer.msgpack.
+
+        Ids only need to be unique per receiver, so every peer using the
+        same encoding gets the very same bytes.
+        """
+        bodies = {False: self._encode_call(method, params)}
+        if any(peer.msgpack for peer in peers):
+            bodies[True] = self._encode_call(method, params, msgpack=True)
+        return bodies
+
+    async def _guarded_call(self, peer: Peer, body: bytes) -> Optional[Dict[str, Any]]:
+        """_call_encoded, throttled by the broadcast semaphore and broadcast_timeout."""
+        async with self._broadcast_sem:
+            return await self._within_broadcast_timeout(peer, self._call_encoded(peer, body), None)
+
+    async def _within_broadcast_timeout(self, peer: Peer, call: Awaitable[Any], on_timeout: Any) -> Any:
+        """Await a call to peer, giving up after broadcast_timeout (if set) with on_timeout."""
+        if self.broadcast_timeout is None:
+            return await call
+        try:
+            return await asyncio.wait_for(call, self.broadcast_timeout)
+        except asyncio.TimeoutError as e:
+            self._record_failure(peer, e)
+            return on_timeout
+
+    def _enqueue(self, peer: Peer, method: str, params: Dict[str, Any]) -> asyncio.Future:
+        """Queue a call for the next batch flush and return its result future."""
+        future = asyncio.get_running_loop().create_future()
+        self._outbox.setdefault(peer.agent_id, []).append((method, params, future))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_outbox())
+        return future
+
+    async def _flush_outbox(self):
+        """Wait out the batch window, then send each peer's queue as one batch."""
+        await asyncio.sleep(self.batch_window)
+        outbox, self._outbox = self._outbox, {}
+        # Broadcasts queued from here on start a new window
+        self._flush_task = None
+        await asyncio.gather(
+            *(self._send_batch(agent_id, entries) for agent_id, entries in outbox.items()),
+            return_exceptions=True,
+        )
+
+    async def _send_batch(self, agent_id: str, entries: List[Tuple[str, Dict[str, Any], asyncio.Future]]):
+        """Deliver one peer's queued calls and resolve their futures."""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(entries)
+        try:
+            peer = self.peers.get(agent_id)
+            if peer is not None:
+                calls = [(method, params) for method, params, _ in entries]
+                async with self._broadcast_sem:
+                    results = await self._within_broadcast_timeout(
+                        peer, self.call_peer_batch(peer, calls), results,
+                    )
+        finally:
+            # Whatever went wrong, no broadcast may be left waiting on its future
+            for (_, _, future), result in zip(entries, results):
+                if not future.done():
+                    future.set_result(result)
+
     # === Health Checks ===
 
     async def health_check_peers(self) -> Dict[str, bool]:
         """
-        Check health of all registered peers.
+        Check health of all registered peers concurrently.
 
         Returns:
             Dict mapping agent_id to health status
         """
-        results = {}
+        peers = list(self.peers.values())
+        if not peers:
+            return {}
+
+        client = await self._get_client()
+        checks = await asyncio.gather(
+            *(self._check_single_peer_health(client, peer) for peer in peers),
+            return_exceptions=True,
+        )
 
-        for peer in self.peers.values():
-            try:
-                client = await self._get_client()
-                response = await client.get(f"{peer.endpoint}/health")
-                response.raise_for_status()
-                peer.is_healthy = True
-                peer.last_seen = datetime.utcnow()
-                results[peer.agent_id] = True
-            except Exception:
-                peer.is_healthy = False
-                results[peer.agent_id] = False
+        return {
+            peer.agent_id: check is True
+            for peer, check in zip(peers, checks)
+        }
 
-        return results
+    async def _check_single_peer_health(self, client: httpx.AsyncClient, peer: Peer) -> bool:
+        """Probe one peer's /health endpoint and record the outcome on the peer."""
+        try:
+            response = await client.get(f"{peer.endpoint}/health")
+            response.raise_for_status()
+        except Exception:
+            self._mark_unhealthy(peer)
+            return False
+
+        self._mark_healthy(peer)
+        peer.last_seen = time.time()
+        return True
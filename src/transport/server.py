@@ -1,10 +1,19 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, Any, Callable, Optional, Union
+from pydantic import BaseModel
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Dict, Any, Callable, List, Mapping, Optional, Tuple, Union
+import hashlib
+import inspect
 import logging
 import asyncio
+import time
 
+from src.models import Contract
 from src.store import MemoryStore
 from src.handlers import (
     ProjectHandlers,
@@ -14,11 +23,103 @@ from src.handlers import (
     FileHandlers,
 )
 from src.handlers.sync_handlers import SyncHandlers
+from src.transport import codec
 from src.transport.peer_registry import PeerRegistry
 
 logger = logging.getLogger(__name__)
 
 
+class CodecJSONResponse(JSONResponse):
+    """JSONResponse rendered with the transport codec (orjson when installed)."""
+
+    def render(self, content: Any) -> bytes:
+        return codec.dumps(content)
+
+
+# Pre-encoded JSON-RPC response fragments; only message/result and id vary
+_ERROR_PREFIXES = {
+    code: b'{"jsonrpc":"2.0","error":{"code":%d,"message":' % code
+    for code in (-32700, -32600, -32601, -32602, -32000)
+}
+_RESULT_PREFIX = b'{"jsonrpc":"2.0","result":'
+_EMPTY_BATCH = b'{"jsonrpc":"2.0","error":{"code":-32600,"message":"Invalid Request: empty batch"},"id":null}'
+
+
+class PeerCORSMiddleware(CORSMiddleware):
+    """
+    CORSMiddleware that passes requests without an Origin header straight on.
+
+    Agents calling each other don't send Origin, so peer RPC skips the CORS
+    header handling that only browsers need.
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not any(name == b"origin" for name, _ in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Shared read-only params for requests that send none; handlers never mutate params
+_EMPTY_PARAMS: Mapping[str, Any] = MappingProxyType({})
+
+
+def _rpc_error(code: int, message: str, request_id: Any) -> bytes:
+    """Encode a JSON-RPC 2.0 error response."""
+    return b"".join((_ERROR_PREFIXES[code], codec.dumps(message), b'},"id":', codec.dumps(request_id), b"}"))
+
+
+def _rpc_result(result: Any, request_id: Any) -> bytes:
+    """Encode a JSON-RPC 2.0 success response."""
+    return b"".join((_RESULT_PREFIX, codec.dumps(result), b',"id":', codec.dumps(request_id), b"}"))
+
+
+def _build_routes(
+    sync_methods: Mapping[str, Callable],
+    async_methods: Mapping[str, Callable],
+) -> Dict[str, Tuple[Callable, bool]]:
+    """
+    Merge the method tables into method -> (handler, is_async).
+
+    Checked once at startup, so dispatch can trust the table: a method in
+    both tables, or a handler in the wrong one, raises ValueError here
+    instead of failing on its first call.
+    """
+    overlap = sync_methods.keys() & async_methods.keys()
+    if overlap:
+        raise ValueError(f"Methods registered as both sync and async: {sorted(overlap)}")
+
+    routes: Dict[str, Tuple[Callable, bool]] = {}
+    for table, is_async in ((sync_methods, False), (async_methods, True)):
+        for method, handler in table.items():
+            if not method.startswith("cacp/"):
+                raise ValueError(f"Method name must start with 'cacp/': {method}")
+            if inspect.iscoroutinefunction(handler) != is_async:
+                kind = "async" if is_async else "sync"
+                raise ValueError(f"Handler for {method} is not {kind}")
+            routes[method] = (handler, is_async)
+    return routes
+
+
+def _json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+def _json_fragment(model: BaseModel) -> codec.RawJSON:
+    """Serialize a model for sync broadcasts, leaving out None fields."""
+    return codec.RawJSON(model.__pydantic_serializer__.to_json(model, exclude_none=True))
+
+
+# Threads for blocking file handlers
+FILE_POOL_WORKERS = 8
+
+# Entities whose last broadcast dump is kept for reuse
+DUMP_CACHE_SIZE = 256
+
+# Seconds a rendered /peers listing is reused; bounds lastSeen staleness
+PEERS_CACHE_TTL = 1.0
+
+
 class BroadcastingHandlers:
     """
     Wrapper that adds peer broadcasting to handlers.
@@ -33,11 +134,21 @@ class BroadcastingHandlers:
         agent_id: str,
         repo_name: str,
         peer_registry: PeerRegistry,
+        background: bool = False,
+        sync_flush_interval: float = 0.0,
     ):
         self.store = store
         self.agent_id = agent_id
         self.repo_name = repo_name
         self.peers = peer_registry
+        self.background = background
+        self.sync_flush_interval = sync_flush_interval
+
+        # Tail of the background broadcast chain (keeps broadcasts in order)
+        self._last_broadcast: Optional[asyncio.Task] = None
+
+        # Contract syncs waiting out sync_flush_interval, by (projectId, contractId)
+        self._pending_contract_sync: Dict[Tuple[str, str], asyncio.Task] = {}
 
         # Original handlers
         self._project = ProjectHandlers(store, agent_id, repo_name)
@@ -45,6 +156,108 @@ class BroadcastingHandlers:
         self._context = ContextHandlers(store, agent_id, repo_name)
         self._impl = ImplementationHandlers(store, agent_id, repo_name)
 
+        # (kind, id) -> (version stamp, encoded dump), most recent last
+        self._dump_cache: OrderedDict[Tuple[str, str], Tuple[Any, codec.RawJSON]] = OrderedDict()
+
+    def _dump(self, kind: str, entity_id: str, stamp: Any, model: BaseModel) -> codec.RawJSON:
+        """
+        Encoded sync dump that is reused while the entity is unchanged.
+
+        Pydantic serializes straight to JSON bytes, which the peer registry
+        splices into the request body instead of encoding a dict again.
+        None fields are left out: every optional model field defaults to
+        None, so receivers rebuild the same model from the shorter payload.
+
+        stamp identifies the entity version (e.g. updated_at); the store
+        restamps on every write, so a matching stamp means an identical dump.
+        """
+        key = (kind, entity_id)
+        cached = self._dump_cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            self._dump_cache.move_to_end(key)
+            return cached[1]
+
+        dumped = _json_fragment(model)
+        self._dump_cache[key] = (stamp, dumped)
+        self._dump_cache.move_to_end(key)
+        if len(self._dump_cache) > DUMP_CACHE_SIZE:
+            self._dump_cache.popitem(last=False)
+        return dumped
+
+    async def _broadcast(self, method: str, params: Dict[str, Any]):
+        """
+        Send a state change to peers.
+
+        In background mode the RPC reply doesn't wait for peers: the
+        broadcast is chained after the previous one and runs as a task, so
+        peers still receive changes in the order they were made.
+        """
+        if not self.background:
+            await self.peers.broadcast(method, params)
+            return
+
+        previous = self._last_broadcast
+
+        async def run():
+            nonlocal previous
+            if previous is not None:
+                await asyncio.gather(previous, return_exceptions=True)
+                previous = None  # Don't keep the whole chain alive
+            await self.peers.broadcast(method, params)
+
+        self._last_broadcast = asyncio.create_task(run())
+
+    async def drain(self):
+        """Wait for pending contract syncs and background broadcasts to finish."""
+        if self._pending_contract_sync:
+            await asyncio.gather(*self._pending_contract_sync.values(), return_exceptions=True)
+        if self._last_broadcast is not None:
+            await asyncio.gather(self._last_broadcast, return_exceptions=True)
+
+    async def _sync_contract(self, project_id: str, contract_id: str):
+        """
+        Broadcast a contract's current state, coalescing rapid changes.
+
+        With sync_flush_interval set, the first change schedules a sync that
+        goes out once the interval has passed, carrying the contract as it is
+        then; changes made in the meantime ride along with it. The delay is
+        bounded by the interval even under a steady stream of edits.
+        """
+        if self.sync_flush_interval <= 0:
+            await self._send_contract_sync(project_id, contract_id)
+            return
+
+        key = (project_id, contract_id)
+        if key not in self._pending_contract_sync:
+            self._pending_contract_sync[key] = asyncio.create_task(self._flush_contract_sync(key))
+
+    async def _flush_contract_sync(self, key: Tuple[str, str]):
+        await asyncio.sleep(self.sync_flush_interval)
+        del self._pending_contract_sync[key]
+        await self._send_contract_sync(*key)
+
+    async def _send_contract_sync(self, project_id: str, contract_id: str):
+        contract = self.store.get_contract(project_id, contract_id)
+        if contract and self.peers.peers:
+            await self._broadcast("cacp/contract/sync", {
+                "projectId": project_id,
+                "contract": self._dump_contract(contract),
+                "source_agent": self.agent_id,
+            })
+
+    async def _write_contract(
+        self,
+        handler: Callable[[Dict[str, Any]], Dict[str, Any]],
+        params: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Run a handler that changes one contract, then sync that contract to peers."""
+        result = handler(params)
+        await self._sync_contract(params["projectId"], params["contractId"])
+        return result
+
+    def _dump_contract(self, contract: Contract) -> codec.RawJSON:
+        return self._dump("contract", contract.contract_id, (contract.version, contract.updated_at), contract)
+
     # === Project methods with broadcasting ===
 
     async def create_project(self, params: Dict[str, Any]) -> Dict[str, Any]:
@@ -55,8 +268,8 @@ class BroadcastingHandlers:
         # Broadcast to peers
         project = self.store.get_project(project_id)
         if project and self.peers.peers:
-            await self.peers.broadcast("cacp/project/sync", {
-                "project": project.model_dump(mode="json"),
+            await self._broadcast("cacp/project/sync", {
+                "project": self._dump("project", project.project_id, project.updated_at, project),
                 "source_agent": self.agent_id,
             })
 
@@ -72,9 +285,9 @@ class BroadcastingHandlers:
         if project:
             repo = project.get_repo_by_name(params["repoName"])
             if repo and self.peers.peers:
-                await self.peers.broadcast("cacp/repo/sync", {
+                await self._broadcast("cacp/repo/sync", {
                     "projectId": project_id,
-                    "repo": repo.model_dump(mode="json"),
+                    "repo": _json_fragment(repo),
                     "source_agent": self.agent_id,
                 })
 
@@ -89,49 +302,17 @@ class BroadcastingHandlers:
         contract_id = result["contractId"]
 
         # Broadcast to peers
-        contract = self.store.get_contract(project_id, contract_id)
-        if contract and self.peers.peers:
-            await self.peers.broadcast("cacp/contract/sync", {
-                "projectId": project_id,
-                "contract": contract.model_dump(mode="json"),
-                "source_agent": self.agent_id,
-            })
+        await self._send_contract_sync(project_id, contract_id)
 
         return result
 
     async def respond_contract(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Respond to contract locally, then broadcast to peers."""
-        result = self._contract.respond(params)
-        project_id = params["projectId"]
-        contract_id = params["contractId"]
-
-        # Broadcast updated contract to peers
-        contract = self.store.get_contract(project_id, contract_id)
-        if contract and self.peers.peers:
-            await self.peers.broadcast("cacp/contract/sync", {
-                "projectId": project_id,
-                "contract": contract.model_dump(mode="json"),
-                "source_agent": self.agent_id,
-            })
-
-        return result
+        return await self._write_contract(self._contract.respond, params)
 
     async def update_contract(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Update contract locally, then broadcast to peers."""
-        result = self._contract.update(params)
-        project_id = params["projectId"]
-        contract_id = params["contractId"]
-
-        # Broadcast updated contract to peers
-        contract = self.store.get_contract(project_id, contract_id)
-        if contract and self.peers.peers:
-            await self.peers.broadcast("cacp/contract/sync", {
-                "projectId": project_id,
-                "contract": contract.model_dump(mode="json"),
-                "source_agent": self.agent_id,
-            })
-
-        return result
+        return await self._write_contract(self._contract.update, params)
 
     # === Context methods with broadcasting ===
 
@@ -144,9 +325,9 @@ class BroadcastingHandlers:
         # Broadcast to peers
         packet = self.store.get_context(project_id, packet_id)
         if packet and self.peers.peers:
-            await self.peers.broadcast("cacp/context/sync", {
+            await self._broadcast("cacp/context/sync", {
                 "projectId": project_id,
-                "packet": packet.model_dump(mode="json"),
+                "packet": self._dump("packet", packet.packet_id, packet.timestamp, packet),
                 "source_agent": self.agent_id,
             })
 
@@ -156,54 +337,15 @@ class BroadcastingHandlers:
 
     async def start_implementation(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Start implementation locally, then broadcast to peers."""
-        result = self._impl.start(params)
-        project_id = params["projectId"]
-        contract_id = params["contractId"]
-
-        # Broadcast updated contract to peers
-        contract = self.store.get_contract(project_id, contract_id)
-        if contract and self.peers.peers:
-            await self.peers.broadcast("cacp/contract/sync", {
-                "projectId": project_id,
-                "contract": contract.model_dump(mode="json"),
-                "source_agent": self.agent_id,
-            })
-
-        return result
+        return await self._write_contract(self._impl.start, params)
 
     async def complete_implementation(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Complete implementation locally, then broadcast to peers."""
-        result = self._impl.complete(params)
-        project_id = params["projectId"]
-        contract_id = params["contractId"]
-
-        # Broadcast updated contract to peers
-        contract = self.store.get_contract(project_id, contract_id)
-        if contract and self.peers.peers:
-            await self.peers.broadcast("cacp/contract/sync", {
-                "projectId": project_id,
-                "contract": contract.model_dump(mode="json"),
-                "source_agent": self.agent_id,
-            })
-
-        return result
+        return await self._write_contract(self._impl.complete, params)
 
     async def verify_implementation(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Verify implementation locally, then broadcast to peers."""
-        result = self._impl.verify(params)
-        project_id = params["projectId"]
-        contract_id = params["contractId"]
-
-        # Broadcast updated contract to peers
-        contract = self.store.get_contract(project_id, contract_id)
-        if contract and self.peers.peers:
-            await self.peers.broadcast("cacp/contract/sync", {
-                "projectId": project_id,
-                "contract": contract.model_dump(mode="json"),
-                "source_agent": self.agent_id,
-            })
-
-        return result
+        return await self._write_contract(self._impl.verify, params)
 
 
 def create_app(
@@ -215,6 +357,9 @@ def create_app(
     workspace_path: Optional[str] = None,
     peer_registry: Optional[PeerRegistry] = None,
     self_endpoint: Optional[str] = None,
+    background_broadcasts: bool = False,
+    sync_flush_interval: float = 0.0,
+    cors_origins: Optional[List[str]] = None,
 ) -> FastAPI:
     """
     Create a FastAPI application for a CACP agent.
@@ -228,17 +373,33 @@ def create_app(
         workspace_path: Path to save received files
         peer_registry: Registry for peer-to-peer communication
         self_endpoint: This agent's endpoint URL for peer communication
+        background_broadcasts: Reply to write RPCs before peers have been
+            updated (broadcasts still go out in order)
+        sync_flush_interval: Seconds to coalesce contract-sync broadcasts for
+            the same contract (0 sends each change immediately)
+        cors_origins: Browser origins allowed to call the agent (default: any)
     """
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        """Clean up resources on shutdown (names are bound further down)."""
+        yield
+        await broadcasting.drain()
+        await asyncio.get_running_loop().run_in_executor(None, file_pool.shutdown)
+        # Closes the shared peer pool only once no other registry uses it
+        await peer_registry.close()
+
     app = FastAPI(
         title=f"CACP Agent - {repo_name}",
         description=f"Coding Agent Coordination Protocol server for {repo_name}",
         version="2.0.0",
+        default_response_class=CodecJSONResponse,
+        lifespan=lifespan,
     )
 
-    # CORS middleware for cross-agent communication
+    # CORS for browser clients; peer-to-peer requests carry no Origin and skip it
     app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
+        PeerCORSMiddleware,
+        allow_origins=cors_origins or ["*"],
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
@@ -264,7 +425,11 @@ def create_app(
     sync_handlers = SyncHandlers(store, agent_id, repo_name)
 
     # Broadcasting handlers (for methods that modify state)
-    broadcasting = BroadcastingHandlers(store, agent_id, repo_name, peer_registry)
+    broadcasting = BroadcastingHandlers(
+        store, agent_id, repo_name, peer_registry,
+        background=background_broadcasts,
+        sync_flush_interval=sync_flush_interval,
+    )
 
     # Method routing table - sync handlers for local-only, async for broadcasting
     sync_methods: Dict[str, Callable] = {
@@ -277,10 +442,8 @@ def create_app(
         "cacp/context/getThread": context_handlers.get_thread,
         "cacp/implementation/getStatus": impl_handlers.get_status,
         # File methods (local only for now)
-        "cacp/file/share": file_handlers.share,
         "cacp/file/request": file_handlers.request,
         "cacp/file/listRequests": file_handlers.list_requests,
-        "cacp/file/fulfillRequest": file_handlers.fulfill_request,
         # Sync methods (receive broadcasts from peers)
         "cacp/project/sync": sync_handlers.project_sync,
         "cacp/contract/sync": sync_handlers.contract_sync,
@@ -297,6 +460,16 @@ def create_app(
             "content": {"question": p["question"], "options": p.get("options"), "urgent": p.get("urgent", False)}
         })
 
+    # File writes (base64 decode + disk IO) run on a small pool so they don't
+    # stall the event loop. Everything else is fast in-memory work and stays put.
+    file_pool = ThreadPoolExecutor(max_workers=FILE_POOL_WORKERS, thread_name_prefix="cacp-file")
+    app.state.file_pool = file_pool
+
+    def offload(handler: Callable) -> Callable:
+        async def run(p):
+            return await asyncio.get_running_loop().run_in_executor(file_pool, handler, p)
+        return run
+
     async def record_decision(p):
         return await broadcasting.share_context({
             **p,
@@ -317,49 +490,39 @@ def create_app(
         "cacp/implementation/start": broadcasting.start_implementation,
         "cacp/implementation/complete": broadcasting.complete_implementation,
         "cacp/implementation/verify": broadcasting.verify_implementation,
+        # Blocking file IO (thread pool)
+        "cacp/file/share": offload(file_handlers.share),
+        "cacp/file/fulfillRequest": offload(file_handlers.fulfill_request),
     }
 
-    @app.post("/")
-    async def handle_rpc(request: Request) -> JSONResponse:
-        """Main JSON-RPC 2.0 endpoint."""
-        try:
-            body = await request.json()
-        except Exception as e:
-            return JSONResponse({
-                "jsonrpc": "2.0",
-                "error": {"code": -32700, "message": f"Parse error: {e}"},
-                "id": None,
-            })
+    # Single lookup table: method -> (handler, is_async), fixed once the app is built
+    routes: Mapping[str, Tuple[Callable, bool]] = MappingProxyType(
+        _build_routes(sync_methods, async_methods)
+    )
 
-        method = body.get("method")
-        params = body.get("params", {})
-        request_id = body.get("id")
+    async def dispatch(body: Any) -> bytes:
+        """Run a single JSON-RPC request object and encode its response."""
+        if not isinstance(body, dict):
+            return _rpc_error(-32600, "Invalid Request: expected an object", None)
+
+        get = body.get
+        method = get("method")
+        params = get("params") or _EMPTY_PARAMS
+        request_id = get("id")
 
         # Validate JSON-RPC structure
-        if body.get("jsonrpc") != "2.0":
-            return JSONResponse({
-                "jsonrpc": "2.0",
-                "error": {"code": -32600, "message": "Invalid Request: jsonrpc must be '2.0'"},
-                "id": request_id,
-            })
+        if get("jsonrpc") != "2.0":
+            return _rpc_error(-32600, "Invalid Request: jsonrpc must be '2.0'", request_id)
 
         if not method:
-            return JSONResponse({
-                "jsonrpc": "2.0",
-                "error": {"code": -32600, "message": "Invalid Request: method is required"},
-                "id": request_id,
-            })
-
-        # Find handler (check async first, then sync)
-        handler = async_methods.get(method) or sync_methods.get(method)
-        is_async = method in async_methods
+            return _rpc_error(-32600, "Invalid Request: method is required", request_id)
+        if not isinstance(method, str):
+            return _rpc_error(-32600, "Invalid Request: method must be a string", request_id)
 
-        if not handler:
-            return JSONResponse({
-                "jsonrpc": "2.0",
-                "error": {"code": -32601, "message": f"Method not found: {method}"},
-                "id": request_id,
-            })
+        route = routes.get(method)
+        if route is None:
+            return _rpc_error(-32601, f"Method not found: {method}", request_id)
+        handler, is_async = route
 
         # Execute handler
         try:
@@ -367,112 +530,168 @@ def create_app(
                 result = await handler(params)
             else:
                 result = handler(params)
-            return JSONResponse({
-                "jsonrpc": "2.0",
-                "result": result,
-                "id": request_id,
-            })
+            return _rpc_result(result, request_id)
         except ValueError as e:
-            return JSONResponse({
-                "jsonrpc": "2.0",
-                "error": {"code": -32602, "message": f"Invalid params: {e}"},
-                "id": request_id,
-            })
+            return _rpc_error(-32602, f"Invalid params: {e}", request_id)
         except Exception as e:
-            logger.exception(f"Error handling {method}")
-            return JSONResponse({
-                "jsonrpc": "2.0",
-                "error": {"code": -32000, "message": f"Server error: {e}"},
-                "id": request_id,
-            })
+            # Tracebacks only at DEBUG: a misbehaving peer can make every request fail
+            logger.error("Error handling %s: %s", method, e, exc_info=logger.isEnabledFor(logging.DEBUG))
+            return _rpc_error(-32000, f"Server error: {e}", request_id)
+
+    @app.post("/")
+    async def handle_rpc(request: Request) -> Response:
+        """
+        Main JSON-RPC 2.0 endpoint. Accepts single requests and batches.
+
+        Peers that support it send MessagePack (Content-Type:
+        application/msgpack); replies are JSON either way.
+        """
+        try:
+            if request.headers.get("content-type", "").startswith(codec.MSGPACK_CONTENT_TYPE):
+                body = codec.unpackb(await request.body())
+            else:
+                body = codec.loads(await request.body())
+        except Exception as e:
+            return _json_response(_rpc_error(-32700, f"Parse error: {e}", None))
+
+        if isinstance(body, list):
+            if not body:
+                return _json_response(_EMPTY_BATCH)
+            # Batched calls are applied in order, so a sync followed by an
+            # update of the same project lands the way it was sent
+            parts = [await dispatch(item) for item in body]
+            return _json_response(b"[" + b",".join(parts) + b"]")
+
+        return _json_response(await dispatch(body))
+
+    @app.post("/files/share")
+    async def share_file_stream(request: Request, projectId: str, name: str) -> Dict[str, Any]:
+        """
+        Share a file sent as the raw request body.
+
+        Same effect as cacp/file/share, for large files: the body is written
+        to the workspace as it arrives instead of being buffered, base64
+        decoded and parsed as JSON.
+        """
+        try:
+            return await file_handlers.share_stream(projectId, name, request.stream(), executor=file_pool)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # What we tell agents that register with us
+    announce = {
+        "agentId": agent_id,
+        "endpoint": self_endpoint or f"http://localhost:8080",
+        "repoName": repo_name,
+        "msgpack": codec.MSGPACK_AVAILABLE,
+    }
 
     @app.post("/peers/register")
     async def register_peer(request: Request) -> Dict[str, Any]:
-        """Register a new peer agent."""
-        body = await request.json()
-        peer_registry.register_peer(
+        """
+        Register a new peer agent.
+
+        The reply carries our own announce payload. Callers that apply it
+        themselves (reciprocal: false, or X-CACP-Inline-Announce: 1) save
+        the extra announce call back to them.
+        """
+        body = codec.loads(await request.body())
+        peer = peer_registry.register_peer(
             agent_id=body["agentId"],
             endpoint=body["endpoint"],
             repo_name=body.get("repoName"),
+            msgpack=body.get("msgpack", False),
         )
 
-        # Announce ourselves back
-        try:
-            await peer_registry.call_peer(
-                peer_registry.get_peer(body["agentId"]),
-                "cacp/peer/announce",
-                {
-                    "agentId": agent_id,
-                    "endpoint": self_endpoint or f"http://localhost:8080",
-                    "repoName": repo_name,
-                }
-            )
-        except Exception:
-            pass
+        inline = body.get("reciprocal") is False or request.headers.get("x-cacp-inline-announce") == "1"
+        if peer is not None and not inline:
+            # Announce ourselves back
+            try:
+                await peer_registry.call_peer(peer, "cacp/peer/announce", announce)
+            except Exception:
+                pass
 
         return {
             "status": "registered",
             "peerCount": len(peer_registry.peers),
+            "announce": announce,
         }
 
+    # Rendered /peers body, keyed on the registry version and refreshed after the TTL
+    peers_cache: Dict[str, Any] = {"version": None, "expires": 0.0, "body": b""}
+
     @app.get("/peers")
-    async def list_peers() -> Dict[str, Any]:
+    async def list_peers() -> Response:
         """List registered peers."""
-        return {
-            "peers": [
-                {
-                    "agentId": p.agent_id,
-                    "endpoint": p.endpoint,
-                    "repoName": p.repo_name,
-                    "isHealthy": p.is_healthy,
-                    "lastSeen": p.last_seen.isoformat(),
-                }
-                for p in peer_registry.list_peers()
-            ]
-        }
+        now = time.monotonic()
+        if peers_cache["version"] != peer_registry.version or now >= peers_cache["expires"]:
+            peers_cache["body"] = codec.dumps({
+                "peers": [
+                    {
+                        "agentId": p.agent_id,
+                        "endpoint": p.endpoint,
+                        "repoName": p.repo_name,
+                        "isHealthy": p.is_healthy,
+                        "lastSeen": p.last_seen_dt.isoformat(),
+                    }
+                    for p in peer_registry.list_peers()
+                ]
+            })
+            peers_cache["version"] = peer_registry.version
+            peers_cache["expires"] = now + PEERS_CACHE_TTL
+        return _json_response(peers_cache["body"])
+
+    # The card only depends on create_app arguments, so build it and its ETag once
+    card = {
+        "name": f"CACP Agent ({repo_name})",
+        "description": f"Coding agent for {repo_name} repository",
+        "version": "2.0.0",
+        "url": self_endpoint or "http://localhost:8080",
+        "protocols": {
+            "a2a": "0.3",
+            "cacp": "2.0",
+        },
+        "capabilities": [language, repo_role],
+        "extensions": {
+            "cacp": {
+                "repo": repo_name,
+                "role": repo_role,
+                "language": language,
+                "agentId": agent_id,
+                "streamingRequests": True,
+                "msgpack": codec.MSGPACK_AVAILABLE,
+                "supportedContractTypes": [
+                    "api_endpoint",
+                    "event_schema",
+                    "data_model",
+                    "config_spec",
+                    "rpc_interface",
+                    "custom",
+                ],
+                "supportedContextTypes": [
+                    "code_snippet",
+                    "type_definition",
+                    "api_spec",
+                    "error_catalog",
+                    "env_config",
+                    "test_case",
+                    "dependency_info",
+                    "implementation_status",
+                    "question",
+                    "decision",
+                ],
+            }
+        },
+    }
+    card_body = codec.dumps(card)
+    card_etag = f'"{hashlib.sha1(card_body).hexdigest()}"'
 
     @app.get("/.well-known/agent.json")
-    async def agent_card() -> Dict[str, Any]:
+    async def agent_card(request: Request) -> Response:
         """Return A2A-compatible agent card with CACP extensions."""
-        return {
-            "name": f"CACP Agent ({repo_name})",
-            "description": f"Coding agent for {repo_name} repository",
-            "version": "2.0.0",
-            "url": self_endpoint or "http://localhost:8080",
-            "protocols": {
-                "a2a": "0.3",
-                "cacp": "2.0",
-            },
-            "capabilities": [language, repo_role],
-            "extensions": {
-                "cacp": {
-                    "repo": repo_name,
-                    "role": repo_role,
-                    "language": language,
-                    "agentId": agent_id,
-                    "supportedContractTypes": [
-                        "api_endpoint",
-                        "event_schema",
-                        "data_model",
-                        "config_spec",
-                        "rpc_interface",
-                        "custom",
-                    ],
-                    "supportedContextTypes": [
-                        "code_snippet",
-                        "type_definition",
-                        "api_spec",
-                        "error_catalog",
-                        "env_config",
-                        "test_case",
-                        "dependency_info",
-                        "implementation_status",
-                        "question",
-                        "decision",
-                    ],
-                }
-            },
-        }
+        if request.headers.get("if-none-match") == card_etag:
+            return Response(status_code=304, headers={"ETag": card_etag})
+        return Response(content=card_body, media_type="application/json", headers={"ETag": card_etag})
 
     @app.get("/health")
     async def health_check() -> Dict[str, Any]:
@@ -484,16 +703,11 @@ def create_app(
             "peerCount": len(peer_registry.peers),
         }
 
+    methods_body = codec.dumps({"methods": list(routes)})
+
     @app.get("/methods")
-    async def list_methods() -> Dict[str, Any]:
+    async def list_methods() -> Response:
         """List available JSON-RPC methods."""
-        return {
-            "methods": list(sync_methods.keys()) + list(async_methods.keys())
-        }
-
-    @app.on_event("shutdown")
-    async def shutdown():
-        """Clean up resources on shutdown."""
-        await peer_registry.close()
+        return _json_response(methods_body)
 
     return app
@@ -0,0 +1,153 @@
+"""
+Shared fixtures: two agents with separate stores, wired to each other
+over in-process HTTP.
+"""
+
+import asyncio
+
+import pytest
+import httpx
+
+from src.store import MemoryStore
+from src.transport import codec, create_app, PeerRegistry
+
+
+def _asgi_client(app) -> httpx.AsyncClient:
+    """Client that drives the app in-process on the test's event loop."""
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+class DistributedTestClient:
+    """
+    Test client that simulates HTTP calls between agents.
+
+    Each agent has its own store. When agent A broadcasts to agent B,
+    the routing client delivers the call to agent B's app.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, agent_id: str):
+        self.client = client
+        self.agent_id = agent_id
+
+    async def call(self, method: str, params: dict) -> dict:
+        """Make a JSON-RPC call."""
+        body = codec.dumps({
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params,
+            "id": "test",
+        })
+        response = await self.client.post("/", content=body, headers={"Content-Type": "application/json"})
+        data = codec.loads(response.content)
+        if "error" in data:
+            raise Exception(f"RPC Error: {data['error']['message']}")
+        return data.get("result", {})
+
+
+def _routing_client(transports: dict[str, httpx.ASGITransport], posts: list[str]) -> httpx.AsyncClient:
+    """
+    HTTP client that delivers each request to the app serving its host.
+
+    Handed to a real PeerRegistry, so peer calls run through the production
+    client and encoding path; only the network hop is replaced. The host of
+    every request sent is appended to posts, in order.
+    """
+    async def handler(request: httpx.Request) -> httpx.Response:
+        posts.append(request.url.host)
+        transport = transports.get(request.url.host)
+        if transport is None:
+            raise httpx.ConnectError(f"No route to {request.url.host}", request=request)
+        return await transport.handle_async_request(request)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.fixture(scope="module")
+def agent_pair():
+    """
+    Create two agents with SEPARATE stores and peer registries.
+
+    This is the correct architecture - each agent is independent.
+    The apps are built once per module; distributed_agents resets their
+    state before each test, and the clients are closed when the module is done.
+    """
+    # Peer endpoint host -> app, filled in once both apps exist
+    transports: dict[str, httpx.ASGITransport] = {}
+
+    # Backend agent - own store, own peer registry
+    backend_store = MemoryStore()
+    backend_posts: list[str] = []
+    backend_peers = PeerRegistry(
+        "agent-backend", "http://backend:8080",
+        http_client=_routing_client(transports, backend_posts),
+    )
+    backend_app = create_app(
+        agent_id="agent-backend",
+        repo_name="backend-api",
+        repo_role="backend",
+        language="python",
+        store=backend_store,
+        peer_registry=backend_peers,
+        self_endpoint="http://backend:8080",
+    )
+    backend_client = _asgi_client(backend_app)
+
+    # Frontend agent - own store, own peer registry
+    frontend_store = MemoryStore()
+    frontend_posts: list[str] = []
+    frontend_peers = PeerRegistry(
+        "agent-frontend", "http://frontend:8081",
+        http_client=_routing_client(transports, frontend_posts),
+    )
+    frontend_app = create_app(
+        agent_id="agent-frontend",
+        repo_name="frontend-app",
+        repo_role="frontend",
+        language="typescript",
+        store=frontend_store,
+        peer_registry=frontend_peers,
+        self_endpoint="http://frontend:8081",
+    )
+    frontend_client = _asgi_client(frontend_app)
+
+    transports["backend"] = httpx.ASGITransport(app=backend_app)
+    transports["frontend"] = httpx.ASGITransport(app=frontend_app)
+
+    yield {
+        "backend": {
+            "client": DistributedTestClient(backend_client, "agent-backend"),
+            "store": backend_store,
+            "peers": backend_peers,
+            "posts": backend_posts,
+        },
+        "frontend": {
+            "client": DistributedTestClient(frontend_client, "agent-frontend"),
+            "store": frontend_store,
+            "peers": frontend_peers,
+            "posts": frontend_posts,
+        },
+    }
+
+    async def close():
+        await backend_client.aclose()
+        await frontend_client.aclose()
+        # Each registry owns and closes its routing client
+        await backend_peers.close()
+        await frontend_peers.close()
+
+    asyncio.run(close())
+
+
+@pytest.fixture
+def distributed_agents(agent_pair):
+    """The module's agent pair with empty stores and freshly registered peers."""
+    agent_pair["backend"]["store"].clear()
+    agent_pair["frontend"]["store"].clear()
+    agent_pair["backend"]["posts"].clear()
+    agent_pair["frontend"]["posts"].clear()
+
+    # Register peers with each other (re-registering resets health and backoff)
+    agent_pair["backend"]["peers"].register_peer("agent-frontend", "http://frontend:8081", "frontend-app")
+    agent_pair["frontend"]["peers"].register_peer("agent-backend", "http://backend:8080", "backend-api")
+
+    return agent_pair
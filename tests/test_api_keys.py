@@ -0,0 +1,43 @@
+"""
+Tests for API key generation and validation.
+"""
+
+import hashlib
+
+import pytest
+
+from src.security import generate_api_key, validate_api_key
+from src.security import api_keys
+
+
+class TestValidateApiKey:
+    """Test key validation, including the format precheck."""
+
+    def test_malformed_key_skips_hashing(self, monkeypatch):
+        _, key_hash = generate_api_key("agent-backend")
+        hashed = []
+        sha256 = hashlib.sha256
+        monkeypatch.setattr(api_keys.hashlib, "sha256", lambda data: hashed.append(data) or sha256(data))
+
+        assert validate_api_key("not-a-key", key_hash) is False
+        assert hashed == []
+
+    def test_unknown_well_formed_key_is_rejected(self):
+        _, key_hash = generate_api_key("agent-backend")
+        other_key, _ = generate_api_key("agent-backend")
+
+        assert validate_api_key(other_key, key_hash) is False
+
+    @pytest.mark.parametrize("environment", api_keys.KEY_ENVIRONMENTS)
+    def test_generated_key_validates(self, environment):
+        key, key_hash = generate_api_key("agent-backend", environment=environment)
+
+        assert validate_api_key(key, key_hash) is True
+
+
+class TestGenerateApiKey:
+    """Test key generation."""
+
+    def test_unknown_environment_is_rejected(self):
+        with pytest.raises(ValueError, match="staging"):
+            generate_api_key("agent-backend", environment="staging")
@@ -0,0 +1,25 @@
+"""
+Tests for the CACP HTTP client.
+"""
+
+from src.transport import CACPClient
+from src.transport.client import get_shared_client
+
+
+class TestSharedClient:
+    """Test the per-loop client CACPClient instances share."""
+
+    def test_call_sync_closes_its_loop_client(self, monkeypatch):
+        used = []
+
+        async def call(self, method, params):
+            used.append(get_shared_client())
+            return {}
+
+        monkeypatch.setattr(CACPClient, "call", call)
+        client = CACPClient("http://backend:8080")
+        client.call_sync("cacp/project/list", {})
+        client.call_sync("cacp/project/list", {})
+
+        assert used[0] is not used[1]
+        assert all(shared.is_closed for shared in used)
@@ -10,139 +10,37 @@ This is the correct architecture for CACP.
 """
 
 import pytest
+import pytest_asyncio
 import asyncio
-import httpx
-from fastapi.testclient import TestClient
-
-import sys
-sys.path.insert(0, ".")
+from datetime import timedelta
 
+from src.handlers import SyncHandlers
+from src.models import ContextPacket, Contract, Project
+from src.models.enums import ContextType, ContractType
 from src.store import MemoryStore
-from src.transport import create_app, PeerRegistry
 
 
-class DistributedTestClient:
-    """
-    Test client that simulates HTTP calls between agents.
+# The two-repo layout most tests coordinate over; never mutated
+STANDARD_REPOS = (
+    {"name": "backend-api", "role": "backend", "language": "python"},
+    {"name": "frontend-app", "role": "frontend", "language": "typescript"},
+)
 
-    Each agent has its own store. When agent A broadcasts to agent B,
-    this client routes the call to agent B's TestClient.
-    """
 
-    def __init__(self, test_client: TestClient, agent_id: str):
-        self.client = test_client
-        self.agent_id = agent_id
-
-    def call(self, method: str, params: dict) -> dict:
-        """Make a JSON-RPC call."""
-        response = self.client.post("/", json={
-            "jsonrpc": "2.0",
-            "method": method,
-            "params": params,
-            "id": "test",
-        })
-        data = response.json()
-        if "error" in data:
-            raise Exception(f"RPC Error: {data['error']['message']}")
-        return data.get("result", {})
-
-
-class MockPeerRegistry(PeerRegistry):
-    """
-    Peer registry that routes calls to TestClients instead of HTTP.
-
-    This allows testing peer-to-peer communication without actual network calls.
-    """
-
-    def __init__(self, self_agent_id: str, self_endpoint: str):
-        super().__init__(self_agent_id, self_endpoint)
-        self.peer_clients: dict[str, TestClient] = {}
-
-    def set_peer_client(self, agent_id: str, client: TestClient):
-        """Set the TestClient for a peer (for routing calls)."""
-        self.peer_clients[agent_id] = client
-
-    async def call_peer(self, peer, method: str, params: dict):
-        """Route call to peer's TestClient."""
-        if peer is None:
-            return None
-
-        client = self.peer_clients.get(peer.agent_id)
-        if not client:
-            return None
-
-        response = client.post("/", json={
-            "jsonrpc": "2.0",
-            "method": method,
-            "params": params,
-            "id": f"{self.self_agent_id}-test",
-        }, headers={
-            "X-Agent-ID": self.self_agent_id,
-            "X-Source-Endpoint": self.self_endpoint,
-        })
-
-        data = response.json()
-        if "error" in data:
-            return None
-
-        return data.get("result")
-
-
-@pytest.fixture
-def distributed_agents():
-    """
-    Create two agents with SEPARATE stores and peer registries.
-
-    This is the correct architecture - each agent is independent.
-    """
-    # Backend agent - own store, own peer registry
-    backend_store = MemoryStore()
-    backend_peers = MockPeerRegistry("agent-backend", "http://backend:8080")
-    backend_app = create_app(
-        agent_id="agent-backend",
-        repo_name="backend-api",
-        repo_role="backend",
-        language="python",
-        store=backend_store,
-        peer_registry=backend_peers,
-        self_endpoint="http://backend:8080",
-    )
-    backend_client = TestClient(backend_app)
-
-    # Frontend agent - own store, own peer registry
-    frontend_store = MemoryStore()
-    frontend_peers = MockPeerRegistry("agent-frontend", "http://frontend:8081")
-    frontend_app = create_app(
-        agent_id="agent-frontend",
-        repo_name="frontend-app",
-        repo_role="frontend",
-        language="typescript",
-        store=frontend_store,
-        peer_registry=frontend_peers,
-        self_endpoint="http://frontend:8081",
-    )
-    frontend_client = TestClient(frontend_app)
-
-    # Register peers with each other
-    backend_peers.register_peer("agent-frontend", "http://frontend:8081", "frontend-app")
-    frontend_peers.register_peer("agent-backend", "http://backend:8080", "backend-api")
-
-    # Set up routing for mock calls
-    backend_peers.set_peer_client("agent-frontend", frontend_client)
-    frontend_peers.set_peer_client("agent-backend", backend_client)
-
-    return {
-        "backend": {
-            "client": DistributedTestClient(backend_client, "agent-backend"),
-            "store": backend_store,
-            "peers": backend_peers,
-        },
-        "frontend": {
-            "client": DistributedTestClient(frontend_client, "agent-frontend"),
-            "store": frontend_store,
-            "peers": frontend_peers,
-        },
-    }
+@pytest_asyncio.fixture
+async def joined_project(distributed_agents):
+    """A project created by the backend and joined by the frontend; returns its id."""
+    project = await distributed_agents["backend"]["client"].call("cacp/project/create", {
+        "name": "Sync Test Project",
+        "objective": "Test peer sync",
+        "repos": list(STANDARD_REPOS),
+    })
+    await distributed_agents["frontend"]["client"].call("cacp/project/join", {
+        "projectId": project["projectId"],
+        "repoName": "frontend-app",
+        "agentEndpoint": "http://frontend:8081",
+    })
+    return project["projectId"]
 
 
 class TestDistributedArchitecture:
@@ -169,27 +67,25 @@ class TestDistributedArchitecture:
         assert backend_peers is not frontend_peers
 
         # Each knows about the other
-        assert "agent-frontend" in [p.agent_id for p in backend_peers.list_peers()]
-        assert "agent-backend" in [p.agent_id for p in frontend_peers.list_peers()]
+        assert backend_peers.get_peer("agent-frontend") is not None
+        assert frontend_peers.get_peer("agent-backend") is not None
 
 
 class TestPeerToPeerSync:
     """Test state synchronization between peers."""
 
-    def test_project_syncs_to_peer(self, distributed_agents):
+    @pytest.mark.asyncio
+    async def test_project_syncs_to_peer(self, distributed_agents):
         """When backend creates project, it should sync to frontend."""
         backend = distributed_agents["backend"]["client"]
         backend_store = distributed_agents["backend"]["store"]
         frontend_store = distributed_agents["frontend"]["store"]
 
         # Backend creates project
-        result = backend.call("cacp/project/create", {
+        result = await backend.call("cacp/project/create", {
             "name": "Sync Test Project",
             "objective": "Test peer sync",
-            "repos": [
-                {"name": "backend-api", "role": "backend", "language": "python"},
-                {"name": "frontend-app", "role": "frontend", "language": "typescript"},
-            ],
+            "repos": list(STANDARD_REPOS),
         })
         project_id = result["projectId"]
 
@@ -201,26 +97,19 @@ class TestPeerToPeerSync:
         assert frontend_project is not None
         assert frontend_project.name == "Sync Test Project"
 
-    def test_contract_syncs_to_peer(self, distributed_agents):
+        # One request to the peer per state change
+        assert distributed_agents["backend"]["posts"] == ["frontend"]
+
+    @pytest.mark.asyncio
+    async def test_contract_syncs_to_peer(self, distributed_agents, joined_project):
         """When backend proposes contract, it should sync to frontend."""
         backend = distributed_agents["backend"]["client"]
-        frontend = distributed_agents["frontend"]["client"]
         backend_store = distributed_agents["backend"]["store"]
         frontend_store = distributed_agents["frontend"]["store"]
-
-        # Create project first
-        project = backend.call("cacp/project/create", {
-            "name": "Contract Sync Test",
-            "objective": "Test contract sync",
-            "repos": [
-                {"name": "backend-api", "role": "backend", "language": "python"},
-                {"name": "frontend-app", "role": "frontend", "language": "typescript"},
-            ],
-        })
-        project_id = project["projectId"]
+        project_id = joined_project
 
         # Backend proposes contract
-        contract = backend.call("cacp/contract/propose", {
+        contract = await backend.call("cacp/contract/propose", {
             "projectId": project_id,
             "type": "api_endpoint",
             "name": "Test API",
@@ -236,34 +125,49 @@ class TestPeerToPeerSync:
         frontend_contract = frontend_store.get_contract(project_id, contract_id)
         assert frontend_contract is not None
         assert frontend_contract.name == "Test API"
-        assert frontend_contract.status.value == "proposed"
+        assert frontend_contract.status == "proposed"
+        # Sync payloads omit None fields; the peer still rebuilds an identical contract
+        assert frontend_contract == backend_contract
 
-    def test_contract_response_syncs_back(self, distributed_agents):
-        """When frontend responds to contract, it should sync back to backend."""
+    @pytest.mark.asyncio
+    async def test_repeated_contract_sync_is_skipped(self, distributed_agents):
+        """A peer re-sending a contract version we already hold is a no-op."""
         backend = distributed_agents["backend"]["client"]
         frontend = distributed_agents["frontend"]["client"]
         backend_store = distributed_agents["backend"]["store"]
-        frontend_store = distributed_agents["frontend"]["store"]
 
-        # Setup: create project and contract
-        project = backend.call("cacp/project/create", {
-            "name": "Response Sync Test",
-            "objective": "Test response sync",
-            "repos": [
-                {"name": "backend-api", "role": "backend", "language": "python"},
-                {"name": "frontend-app", "role": "frontend", "language": "typescript"},
-            ],
+        project = await backend.call("cacp/project/create", {
+            "name": "Duplicate Sync Test",
+            "objective": "Test duplicate sync",
+            "repos": list(STANDARD_REPOS),
         })
         project_id = project["projectId"]
+        contract = await backend.call("cacp/contract/propose", {
+            "projectId": project_id,
+            "type": "api_endpoint",
+            "name": "Test API",
+            "content": {"method": "GET", "path": "/test"},
+        })
 
-        # Frontend joins
-        frontend.call("cacp/project/join", {
+        # Replay the sync the frontend already received
+        replay = await frontend.call("cacp/contract/sync", {
             "projectId": project_id,
-            "repoName": "frontend-app",
-            "agentEndpoint": "http://frontend:8081",
+            "contract": backend_store.get_contract(project_id, contract["contractId"]).model_dump(mode="json"),
+            "source_agent": "agent-backend",
         })
 
-        contract = backend.call("cacp/contract/propose", {
+        assert replay["status"] == "skipped"
+
+    @pytest.mark.asyncio
+    async def test_contract_response_syncs_back(self, distributed_agents, joined_project):
+        """When frontend responds to contract, it should sync back to backend."""
+        backend = distributed_agents["backend"]["client"]
+        frontend = distributed_agents["frontend"]["client"]
+        backend_store = distributed_agents["backend"]["store"]
+        frontend_store = distributed_agents["frontend"]["store"]
+        project_id = joined_project
+
+        contract = await backend.call("cacp/contract/propose", {
             "projectId": project_id,
             "type": "api_endpoint",
             "name": "Response Test API",
@@ -272,7 +176,7 @@ class TestPeerToPeerSync:
         contract_id = contract["contractId"]
 
         # Frontend responds with agree
-        frontend.call("cacp/contract/respond", {
+        await frontend.call("cacp/contract/respond", {
             "projectId": project_id,
             "contractId": contract_id,
             "action": "agree",
@@ -280,38 +184,22 @@ class TestPeerToPeerSync:
 
         # Frontend's local store should show agreed
         frontend_contract = frontend_store.get_contract(project_id, contract_id)
-        assert frontend_contract.status.value == "agreed"
+        assert frontend_contract.status == "agreed"
 
         # Backend should also see agreed (via sync)
         backend_contract = backend_store.get_contract(project_id, contract_id)
-        assert backend_contract.status.value == "agreed"
+        assert backend_contract.status == "agreed"
 
-    def test_context_syncs_between_peers(self, distributed_agents):
+    @pytest.mark.asyncio
+    async def test_context_syncs_between_peers(self, distributed_agents, joined_project):
         """Context packets should sync between peers."""
-        backend = distributed_agents["backend"]["client"]
         frontend = distributed_agents["frontend"]["client"]
         backend_store = distributed_agents["backend"]["store"]
         frontend_store = distributed_agents["frontend"]["store"]
-
-        # Setup
-        project = backend.call("cacp/project/create", {
-            "name": "Context Sync Test",
-            "objective": "Test context sync",
-            "repos": [
-                {"name": "backend-api", "role": "backend", "language": "python"},
-                {"name": "frontend-app", "role": "frontend", "language": "typescript"},
-            ],
-        })
-        project_id = project["projectId"]
-
-        frontend.call("cacp/project/join", {
-            "projectId": project_id,
-            "repoName": "frontend-app",
-            "agentEndpoint": "http://frontend:8081",
-        })
+        project_id = joined_project
 
         # Frontend shares context
-        context = frontend.call("cacp/context/share", {
+        context = await frontend.call("cacp/context/share", {
             "projectId": project_id,
             "type": "question",
             "content": {"question": "What auth method?", "urgent": False},
@@ -328,10 +216,182 @@ class TestPeerToPeerSync:
         assert backend_packet.content["question"] == "What auth method?"
 
 
+class TestSyncMerge:
+    """Test that peer syncs converge whatever order they arrive in."""
+
+    def test_contract_merge_is_order_independent(self):
+        base = Contract(type=ContractType.API_ENDPOINT, name="API", content={}, proposed_by="repo-a")
+        updated = base.model_copy(update={"version": 2})
+        touched = base.model_copy(update={"updated_at": base.updated_at + timedelta(seconds=1)})
+
+        stores = []
+        for order in ((updated, touched), (touched, updated)):
+            store = MemoryStore()
+            project = store.create_project(Project(name="Merge", objective="Test"))
+            for contract in order:
+                store.merge_contract(project.project_id, contract.model_copy())
+            stores.append((store, project.project_id))
+
+        for store, project_id in stores:
+            assert store.get_contract(project_id, base.contract_id).version == 2
+            # Re-delivery changes nothing
+            assert store.merge_contract(project_id, updated.model_copy()) == "skipped"
+
+    def test_project_sync_is_order_independent(self):
+        """An older snapshot still contributes the contracts it carries."""
+        base = Project(name="Merge", objective="Test")
+        older = base.model_copy(update={"contracts": [
+            Contract(type=ContractType.API_ENDPOINT, name="X", content={}, proposed_by="repo-a"),
+        ]})
+        newer = base.model_copy(update={
+            "contracts": [Contract(type=ContractType.API_ENDPOINT, name="Y", content={}, proposed_by="repo-a")],
+            "updated_at": base.updated_at + timedelta(seconds=1),
+        })
+
+        for order in ((older, newer), (newer, older)):
+            store = MemoryStore()
+            handlers = SyncHandlers(store, "agent-frontend", "frontend-app")
+            for snapshot in order:
+                handlers.project_sync({"project": snapshot.model_dump(mode="json"), "source_agent": "agent-backend"})
+
+            assert {c.name for c in store.get_project(base.project_id).contracts} == {"X", "Y"}
+            # Re-delivery changes nothing
+            result = handlers.project_sync({"project": older.model_dump(mode="json"), "source_agent": "agent-backend"})
+            assert result["status"] == "skipped"
+
+    def test_late_packets_are_threaded_in_time_order(self):
+        """Packets synced out of order still come back in timestamp order."""
+        store = MemoryStore()
+        project = store.create_project(Project(name="Thread", objective="Test"))
+        root = ContextPacket(from_repo="repo-a", from_agent="agent-a", type=ContextType.QUESTION, content={})
+        first, second = (
+            ContextPacket(
+                from_repo="repo-b", from_agent="agent-b", type=ContextType.DECISION, content={},
+                reply_to=root.packet_id, timestamp=root.timestamp + timedelta(seconds=offset),
+            )
+            for offset in (1, 2)
+        )
+
+        for packet in (root, second, first):
+            store.add_context(project.project_id, packet)
+
+        assert store.get_thread(project.project_id, root.packet_id) == [root, first, second]
+        assert store.list_context(project.project_id) == [root, first, second]
+
+    @pytest.mark.asyncio
+    async def test_project_sync_keeps_contracts_synced_earlier(self, distributed_agents):
+        """A later project snapshot joins with, rather than replaces, local state."""
+        backend = distributed_agents["backend"]["client"]
+        frontend = distributed_agents["frontend"]["client"]
+        frontend_store = distributed_agents["frontend"]["store"]
+
+        project = await backend.call("cacp/project/create", {
+            "name": "Merge",
+            "objective": "Test",
+            "repos": [{"name": "backend-api", "role": "backend", "language": "python"}],
+        })
+        project_id = project["projectId"]
+        contract = await backend.call("cacp/contract/propose", {
+            "projectId": project_id,
+            "type": "api_endpoint",
+            "name": "Test API",
+            "content": {},
+        })
+
+        # Newer than the frontend's copy, but without the contract
+        snapshot = Project(name="Merge", objective="Test", project_id=project_id)
+        result = await frontend.call("cacp/project/sync", {
+            "project": snapshot.model_dump(mode="json"),
+            "source_agent": "agent-backend",
+        })
+
+        assert result["status"] == "skipped"
+        assert frontend_store.get_contract(project_id, contract["contractId"]) is not None
+
+
+class TestBatchRequests:
+    """Test JSON-RPC batch handling on the server."""
+
+    @pytest.mark.asyncio
+    async def test_batched_broadcasts_share_one_request(self, distributed_agents):
+        """With a batch window, syncs made close together reach the peer as one batch."""
+        backend = distributed_agents["backend"]["client"]
+        backend_peers = distributed_agents["backend"]["peers"]
+        backend_posts = distributed_agents["backend"]["posts"]
+        frontend_store = distributed_agents["frontend"]["store"]
+
+        project = await backend.call("cacp/project/create", {
+            "name": "Batch Test",
+            "objective": "Test batched sync",
+            "repos": [{"name": "backend-api", "role": "backend", "language": "python"}],
+        })
+        backend_posts.clear()
+
+        backend_peers.batch_window = 0.01
+        try:
+            await asyncio.gather(*(
+                backend_peers.broadcast("cacp/context/sync", {
+                    "projectId": project["projectId"],
+                    "packet": {
+                        "packet_id": packet_id,
+                        "from_repo": "repo-backend",
+                        "from_agent": "agent-backend",
+                        "type": "decision",
+                        "content": {"decision": "Use REST"},
+                    },
+                    "source_agent": "agent-backend",
+                })
+                for packet_id in ("pkt-1", "pkt-2")
+            ))
+        finally:
+            backend_peers.batch_window = 0.0
+
+        assert backend_posts == ["frontend"]
+        assert frontend_store.get_context(project["projectId"], "pkt-1") is not None
+        assert frontend_store.get_context(project["projectId"], "pkt-2") is not None
+
+    @pytest.mark.asyncio
+    async def test_batch_returns_response_per_call(self, distributed_agents):
+        client = distributed_agents["backend"]["client"].client
+
+        response = await client.post("/", json=[
+            {"jsonrpc": "2.0", "method": "cacp/project/list", "params": {}, "id": "a"},
+            {"jsonrpc": "2.0", "method": "cacp/unknown", "params": {}, "id": "b"},
+        ])
+        data = response.json()
+
+        assert [item["id"] for item in data] == ["a", "b"]
+        assert "result" in data[0]
+        assert data[1]["error"]["code"] == -32601
+
+    @pytest.mark.asyncio
+    async def test_non_string_method_fails_only_its_item(self, distributed_agents):
+        client = distributed_agents["backend"]["client"].client
+
+        response = await client.post("/", json=[
+            {"jsonrpc": "2.0", "method": ["cacp/project/list"], "params": {}, "id": "a"},
+            {"jsonrpc": "2.0", "method": "cacp/project/list", "params": {}, "id": "b"},
+        ])
+        data = response.json()
+
+        assert response.status_code == 200
+        assert data[0]["error"]["code"] == -32600
+        assert "result" in data[1]
+
+    @pytest.mark.asyncio
+    async def test_empty_batch_is_invalid(self, distributed_agents):
+        client = distributed_agents["backend"]["client"].client
+
+        data = (await client.post("/", json=[])).json()
+
+        assert data["error"]["code"] == -32600
+
+
 class TestFullDistributedWorkflow:
     """Test complete workflow with distributed agents."""
 
-    def test_full_coordination_separate_stores(self, distributed_agents):
+    @pytest.mark.asyncio
+    async def test_full_coordination_separate_stores(self, distributed_agents):
         """
         Full coordination flow with truly separate stores.
 
@@ -343,13 +403,10 @@ class TestFullDistributedWorkflow:
         frontend_store = distributed_agents["frontend"]["store"]
 
         # Step 1: Backend creates project
-        project = backend.call("cacp/project/create", {
+        project = await backend.call("cacp/project/create", {
             "name": "Full Distributed Test",
             "objective": "Prove distributed architecture works",
-            "repos": [
-                {"name": "backend-api", "role": "backend", "language": "python"},
-                {"name": "frontend-app", "role": "frontend", "language": "typescript"},
-            ],
+            "repos": list(STANDARD_REPOS),
         })
         project_id = project["projectId"]
 
@@ -358,14 +415,14 @@ class TestFullDistributedWorkflow:
         assert frontend_store.get_project(project_id) is not None
 
         # Step 2: Frontend joins
-        frontend.call("cacp/project/join", {
+        await frontend.call("cacp/project/join", {
             "projectId": project_id,
             "repoName": "frontend-app",
             "agentEndpoint": "http://frontend:8081",
         })
 
         # Step 3: Backend proposes contract
-        contract = backend.call("cacp/contract/propose", {
+        contract = await backend.call("cacp/contract/propose", {
             "projectId": project_id,
             "type": "api_endpoint",
             "name": "User API",
@@ -378,61 +435,63 @@ class TestFullDistributedWorkflow:
         assert frontend_store.get_contract(project_id, contract_id) is not None
 
         # Step 4: Frontend agrees
-        frontend.call("cacp/contract/respond", {
+        await frontend.call("cacp/contract/respond", {
             "projectId": project_id,
             "contractId": contract_id,
             "action": "agree",
         })
 
         # Verify both see agreed status
-        assert backend_store.get_contract(project_id, contract_id).status.value == "agreed"
-        assert frontend_store.get_contract(project_id, contract_id).status.value == "agreed"
+        assert backend_store.get_contract(project_id, contract_id).status == "agreed"
+        assert frontend_store.get_contract(project_id, contract_id).status == "agreed"
 
         # Step 5: Both implement
-        backend.call("cacp/implementation/start", {
+        await backend.call("cacp/implementation/start", {
             "projectId": project_id,
             "contractId": contract_id,
             "plan": "Implement backend",
         })
-        backend.call("cacp/implementation/complete", {
+        await backend.call("cacp/implementation/complete", {
             "projectId": project_id,
             "contractId": contract_id,
             "files": ["api.py"],
         })
 
-        frontend.call("cacp/implementation/start", {
+        await frontend.call("cacp/implementation/start", {
             "projectId": project_id,
             "contractId": contract_id,
             "plan": "Implement frontend",
         })
-        frontend.call("cacp/implementation/complete", {
+        await frontend.call("cacp/implementation/complete", {
             "projectId": project_id,
             "contractId": contract_id,
             "files": ["api.ts"],
         })
 
         # Verify both see implemented
-        assert backend_store.get_contract(project_id, contract_id).status.value == "implemented"
-        assert frontend_store.get_contract(project_id, contract_id).status.value == "implemented"
+        assert backend_store.get_contract(project_id, contract_id).status == "implemented"
+        assert frontend_store.get_contract(project_id, contract_id).status == "implemented"
 
         # Step 6: Verify
-        backend.call("cacp/implementation/verify", {
+        await backend.call("cacp/implementation/verify", {
             "projectId": project_id,
             "contractId": contract_id,
             "result": "success",
         })
 
         # Verify both see verified
-        assert backend_store.get_contract(project_id, contract_id).status.value == "verified"
-        assert frontend_store.get_contract(project_id, contract_id).status.value == "verified"
+        assert backend_store.get_contract(project_id, contract_id).status == "verified"
+        assert frontend_store.get_contract(project_id, contract_id).status == "verified"
 
         # Final check: stores are still separate objects
         assert backend_store is not frontend_store
 
-        print("\n" + "="*60)
-        print("SUCCESS: Full workflow completed with SEPARATE stores!")
-        print("Each agent maintained its own state, synchronized via protocol.")
-        print("="*60)
+        print("\n".join([
+            "\n" + "="*60,
+            "SUCCESS: Full workflow completed with SEPARATE stores!",
+            "Each agent maintained its own state, synchronized via protocol.",
+            "="*60,
+        ]))
 
 
 if __name__ == "__main__":
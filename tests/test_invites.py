@@ -0,0 +1,31 @@
+"""
+Tests for the project invite system.
+"""
+
+import pytest
+
+from src.security import InviteManager
+
+
+@pytest.fixture
+def manager():
+    return InviteManager()
+
+
+class TestInviteExpiry:
+    """Test expiry sweeps."""
+
+    def test_cleanup_removes_only_expired(self, manager):
+        fresh = manager.create_invite("project-1", "backend-api", ["project:read"])
+        stale = manager.create_invite("project-1", "frontend-app", ["project:read"], expires_in_hours=-1)
+
+        assert manager.cleanup_expired() == 1
+        assert manager.get_invite(fresh) is not None
+        assert manager.get_invite(stale) is None
+
+    def test_cleanup_skips_revoked_invites(self, manager):
+        code = manager.create_invite("project-1", "backend-api", ["project:read"], expires_in_hours=-1)
+        assert manager.revoke_invite(code)
+
+        assert manager.cleanup_expired() == 0
+        assert manager._expiry_heap == []
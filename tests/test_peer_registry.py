@@ -0,0 +1,601 @@
+"""
+Tests for PeerRegistry discovery and broadcast behaviour.
+
+These exercise the registry directly with fake ADP/peer backends,
+without running any agent servers.
+"""
+
+import asyncio
+import json
+import types
+
+import httpx
+import pytest
+
+from src.adp.client import AgentInfo
+from src.models import Project
+from src.store import MemoryStore
+from src.transport import PeerRegistry, codec, create_app
+from src.transport import peer_registry
+from src.transport.peer_registry import _assemble_results, close_shared_peer_clients
+from src.transport.server import BroadcastingHandlers
+
+
+class FakeADP:
+    """ADP client stand-in that counts lookups."""
+
+    def __init__(self):
+        self.searches = 0
+        self.gets = 0
+
+    async def search_cacp_agents(self, role=None, languages=None):
+        self.searches += 1
+        await asyncio.sleep(0)
+        return [AgentInfo(
+            aid="aid://example.com/frontend@1.0.0",
+            name="Frontend",
+            description="",
+            endpoint="http://frontend:8081",
+            verified=True,
+            role="frontend",
+        )]
+
+    async def get_agent(self, aid):
+        self.gets += 1
+        await asyncio.sleep(0)
+        return {
+            "aid": aid,
+            "verified": True,
+            "manifest": {"invocation": {"protocols": [{"type": "cacp", "endpoint": "http://mobile:8082"}]}},
+        }
+
+    def get_cacp_endpoint(self, agent):
+        return agent["manifest"]["invocation"]["protocols"][0]["endpoint"]
+
+
+@pytest.fixture
+def adp():
+    return FakeADP()
+
+
+@pytest.fixture
+def registry(adp):
+    return PeerRegistry("agent-backend", "http://backend:8080", adp_client=adp)
+
+
+class RecordingPeerRegistry(PeerRegistry):
+    """Registry whose peer requests succeed locally and are recorded."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = []
+        self.batches = []
+        self.bodies = []
+
+    async def _post(self, peer, body):
+        self.bodies.append(body)
+        request = json.loads(body)
+        if isinstance(request, list):
+            self.batches.append((peer.agent_id, [item["method"] for item in request]))
+            return [_ok(item) for item in request]
+        self.calls.append((peer.agent_id, request["method"]))
+        return _ok(request)
+
+
+def _ok(request):
+    return {"jsonrpc": "2.0", "result": {"status": "ok"}, "id": request["id"]}
+
+
+@pytest.fixture
+def recording():
+    registry = RecordingPeerRegistry("agent-backend", "http://backend:8080")
+    registry.register_peer("agent-frontend", "http://frontend:8081", verified=True)
+    registry.register_peer("agent-mobile", "http://mobile:8082")
+    return registry
+
+
+class TestSharedClient:
+    """Test that registries share one connection pool."""
+
+    @pytest.mark.asyncio
+    async def test_registries_share_client_per_timeout(self):
+        first = PeerRegistry("agent-backend", "http://backend:8080")
+        second = PeerRegistry("agent-frontend", "http://frontend:8081")
+        other = PeerRegistry("agent-mobile", "http://mobile:8082", timeout=2.0)
+
+        assert await first._get_client() is await second._get_client()
+        assert await other._get_client() is not await first._get_client()
+        assert (await first._get_client()).timeout.connect == 0.5
+
+        await first.close()
+        assert not (await second._get_client()).is_closed
+
+        await close_shared_peer_clients()
+
+    @pytest.mark.asyncio
+    async def test_calls_reuse_cached_shared_client(self, monkeypatch):
+        fetched = []
+
+        def shared_client(timeout, connect_timeout):
+            fetched.append(timeout)
+            return httpx.AsyncClient(transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, json=_ok(json.loads(request.content))),
+            ))
+
+        monkeypatch.setattr(peer_registry, "get_shared_peer_client", shared_client)
+        registry = PeerRegistry("agent-backend", "http://backend:8080")
+        peer = registry.register_peer("agent-frontend", "http://frontend:8081")
+
+        await registry.call_peer(peer, "cacp/project/list", {})
+        await registry.call_peer(peer, "cacp/project/list", {})
+
+        assert fetched == [registry.timeout]
+
+
+class TestBroadcastTargets:
+    """Test which peers a broadcast reaches."""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_skips_unhealthy_and_excluded(self, recording):
+        recording.register_peer("agent-docs", "http://docs:8083")
+        recording._mark_unhealthy(recording.get_peer("agent-mobile"))
+
+        results = await recording.broadcast("cacp/project/sync", {}, exclude=["agent-docs"])
+
+        assert set(results) == {"agent-frontend"}
+        assert recording.calls == [("agent-frontend", "cacp/project/sync")]
+
+    @pytest.mark.asyncio
+    async def test_broadcast_skips_peer_in_backoff(self, recording):
+        frontend = recording.get_peer("agent-frontend")
+        recording._record_failure(frontend, RuntimeError("timeout"))
+
+        results = await recording.broadcast("cacp/project/sync", {})
+        assert set(results) == {"agent-mobile"}
+
+        frontend.not_before = 0.0
+        results = await recording.broadcast("cacp/project/sync", {})
+        assert set(results) == {"agent-frontend", "agent-mobile"}
+
+    def test_assemble_results_reports_failures(self):
+        results = _assemble_results(
+            ["agent-frontend", "agent-mobile", "agent-docs"],
+            [{"status": "ok"}, None, RuntimeError("boom")],
+        )
+
+        assert results == {
+            "agent-frontend": {"status": "ok"},
+            "agent-mobile": {"error": "No response"},
+            "agent-docs": {"error": "boom"},
+        }
+
+    def test_verified_index_tracks_registration(self, recording):
+        assert [p.agent_id for p in recording.get_verified_peers()] == ["agent-frontend"]
+
+        recording.unregister_peer("agent-frontend")
+        assert recording.get_verified_peers() == []
+
+
+class SlowPeerRegistry(PeerRegistry):
+    """Registry whose peer requests take a moment and track concurrency."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def _post(self, peer, body):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        return _ok(json.loads(body))
+
+
+class TestBroadcastConcurrency:
+    """Test that broadcast fan-out is bounded."""
+
+    @pytest.mark.asyncio
+    async def test_in_flight_calls_capped(self):
+        registry = SlowPeerRegistry("agent-backend", "http://backend:8080", max_concurrency=3)
+        for i in range(10):
+            registry.register_peer(f"agent-{i}", f"http://peer-{i}:8080")
+
+        results = await registry.broadcast("cacp/project/sync", {})
+
+        assert len(results) == 10
+        assert registry.peak == 3
+
+
+class StragglerPeerRegistry(PeerRegistry):
+    """Registry where one peer never answers in time."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cancelled = []
+
+    async def _post(self, peer, body):
+        if peer.agent_id == "agent-slow":
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                self.cancelled.append(peer.agent_id)
+                raise
+        return _ok(json.loads(body))
+
+
+class TestBroadcastQuorum:
+    """Test early return once enough peers have answered."""
+
+    @pytest.mark.asyncio
+    async def test_returns_at_quorum_and_cancels_stragglers(self):
+        registry = StragglerPeerRegistry("agent-backend", "http://backend:8080")
+        for agent_id in ("agent-frontend", "agent-mobile", "agent-slow"):
+            registry.register_peer(agent_id, f"http://{agent_id}:8080")
+
+        results = await asyncio.wait_for(
+            registry.broadcast_quorum("cacp/contract/sync", {}, quorum=2),
+            timeout=1,
+        )
+        await asyncio.sleep(0)
+
+        assert set(results) == {"agent-frontend", "agent-mobile"}
+        assert registry.cancelled == ["agent-slow"]
+        assert registry.get_peer("agent-slow").failed_attempts == 0
+
+    @pytest.mark.asyncio
+    async def test_unencodable_params_fail_locally(self, recording):
+        results = await recording.broadcast_quorum("cacp/contract/sync", {"bad": object()}, quorum=1)
+
+        assert results == {}
+        assert recording.calls == []
+        assert recording.get_peer("agent-frontend").failed_attempts == 0
+
+
+class TestBroadcastTimeout:
+    """Test the per-peer broadcast timeout."""
+
+    @pytest.mark.asyncio
+    async def test_slow_peer_times_out(self):
+        registry = StragglerPeerRegistry("agent-backend", "http://backend:8080", broadcast_timeout=0.05)
+        registry.register_peer("agent-frontend", "http://frontend:8081")
+        registry.register_peer("agent-slow", "http://slow:8082")
+
+        results = await registry.broadcast("cacp/contract/sync", {})
+
+        assert results["agent-frontend"] == {"status": "ok"}
+        assert results["agent-slow"] == {"error": "No response"}
+        assert registry.get_peer("agent-slow").failed_attempts == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_peer_times_out_in_batch(self):
+        registry = StragglerPeerRegistry(
+            "agent-backend", "http://backend:8080", broadcast_timeout=0.05, batch_window=0.01,
+        )
+        registry.register_peer("agent-slow", "http://slow:8082")
+
+        results = await asyncio.wait_for(registry.broadcast("cacp/contract/sync", {}), timeout=1)
+
+        assert results == {"agent-slow": {"error": "No response"}}
+        assert registry.get_peer("agent-slow").failed_attempts == 1
+
+
+class TestBackgroundBroadcasts:
+    """Test replying to writes before peers are updated."""
+
+    @pytest.mark.asyncio
+    async def test_broadcasts_run_after_reply_in_order(self, recording):
+        broadcasting = BroadcastingHandlers(
+            MemoryStore(), "agent-backend", "backend-api", recording, background=True,
+        )
+
+        result = await broadcasting.create_project({
+            "name": "Demo",
+            "objective": "Test",
+            "repos": [{"name": "backend-api", "role": "backend", "language": "python"}],
+        })
+        await broadcasting.share_context({
+            "projectId": result["projectId"],
+            "type": "decision",
+            "content": {"decision": "Use REST"},
+        })
+        assert recording.calls == []
+
+        await broadcasting.drain()
+        assert [method for _, method in recording.calls] == [
+            "cacp/project/sync", "cacp/project/sync", "cacp/context/sync", "cacp/context/sync",
+        ]
+
+
+class TestContractSyncCoalescing:
+    """Test that rapid changes to one contract share a sync broadcast."""
+
+    @pytest.mark.asyncio
+    async def test_burst_of_updates_sends_one_sync(self, recording):
+        broadcasting = BroadcastingHandlers(
+            MemoryStore(), "agent-backend", "backend-api", recording, sync_flush_interval=0.01,
+        )
+        project = await broadcasting.create_project({
+            "name": "Demo",
+            "objective": "Test",
+            "repos": [{"name": "backend-api", "role": "backend", "language": "python"}],
+        })
+        project_id = project["projectId"]
+        contract = await broadcasting.propose_contract({
+            "projectId": project_id,
+            "type": "api_endpoint",
+            "name": "User API",
+            "content": {"path": "/v1"},
+        })
+        recording.calls.clear()
+
+        for version in range(2, 5):
+            await broadcasting.update_contract({
+                "projectId": project_id,
+                "contractId": contract["contractId"],
+                "content": {"path": f"/v{version}"},
+            })
+        await broadcasting.drain()
+
+        assert sorted(recording.calls) == [
+            ("agent-frontend", "cacp/contract/sync"),
+            ("agent-mobile", "cacp/contract/sync"),
+        ]
+
+
+class MalformedBatchPeerRegistry(PeerRegistry):
+    """Registry whose peer answers every batch with a non-object item."""
+
+    async def _post(self, peer, body):
+        return [1]
+
+
+class TestBroadcastBatching:
+    """Test that broadcasts within the batch window share one request."""
+
+    @pytest.mark.asyncio
+    async def test_broadcasts_coalesce_per_peer(self):
+        registry = RecordingPeerRegistry("agent-backend", "http://backend:8080", batch_window=0.01)
+        registry.register_peer("agent-frontend", "http://frontend:8081")
+
+        results = await asyncio.gather(
+            registry.broadcast("cacp/project/sync", {}),
+            registry.broadcast("cacp/context/sync", {}),
+        )
+
+        assert results == [{"agent-frontend": {"status": "ok"}}] * 2
+        assert registry.batches == [("agent-frontend", ["cacp/project/sync", "cacp/context/sync"])]
+        assert registry.calls == []
+
+    @pytest.mark.asyncio
+    async def test_immediate_bypasses_batching(self):
+        registry = RecordingPeerRegistry("agent-backend", "http://backend:8080", batch_window=0.01)
+        registry.register_peer("agent-frontend", "http://frontend:8081")
+
+        await registry.broadcast("cacp/project/sync", {}, immediate=True)
+
+        assert registry.calls == [("agent-frontend", "cacp/project/sync")]
+        assert registry.batches == []
+
+    @pytest.mark.asyncio
+    async def test_malformed_batch_reply_does_not_hang(self):
+        registry = MalformedBatchPeerRegistry("agent-backend", "http://backend:8080", batch_window=0.01)
+        registry.register_peer("agent-frontend", "http://frontend:8081")
+
+        results = await asyncio.wait_for(registry.broadcast("cacp/project/sync", {}), timeout=1)
+
+        assert results == {"agent-frontend": {"error": "No response"}}
+
+    @pytest.mark.asyncio
+    async def test_unencodable_call_fails_alone(self):
+        registry = RecordingPeerRegistry("agent-backend", "http://backend:8080", batch_window=0.01)
+        peer = registry.register_peer("agent-frontend", "http://frontend:8081")
+
+        results = await asyncio.gather(
+            registry.broadcast("cacp/project/sync", {}),
+            registry.broadcast("cacp/contract/sync", {"bad": object()}),
+            registry.broadcast("cacp/context/sync", {}),
+        )
+
+        assert results == [
+            {"agent-frontend": {"status": "ok"}},
+            {"agent-frontend": {"error": "No response"}},
+            {"agent-frontend": {"status": "ok"}},
+        ]
+        assert registry.batches == [("agent-frontend", ["cacp/project/sync", "cacp/context/sync"])]
+        assert peer.failed_attempts == 0
+        assert peer.is_healthy
+
+
+class TestRawParams:
+    """Test that pre-encoded params are spliced into request bodies."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("batch_window", [0.0, 0.01])
+    async def test_raw_json_params_arrive_as_objects(self, batch_window):
+        registry = RecordingPeerRegistry("agent-backend", "http://backend:8080", batch_window=batch_window)
+        registry.register_peer("agent-frontend", "http://frontend:8081")
+
+        await registry.broadcast("cacp/project/sync", {
+            "project": codec.RawJSON(b'{"project_id":"p1"}'),
+            "source_agent": "agent-backend",
+        })
+
+        request = json.loads(registry.bodies[0])
+        if isinstance(request, list):
+            request = request[0]
+        assert request["params"] == {"project": {"project_id": "p1"}, "source_agent": "agent-backend"}
+
+
+class TestLargeBodies:
+    """Test chunked upload of large request bodies."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("streaming", [True, False])
+    async def test_large_body_streams_only_to_capable_peers(self, streaming):
+        seen = []
+
+        def handler(request):
+            seen.append((request.headers.get("transfer-encoding"), len(request.content)))
+            return httpx.Response(200, json={"jsonrpc": "2.0", "result": {"status": "ok"}, "id": "x"})
+
+        registry = PeerRegistry(
+            "agent-backend",
+            "http://backend:8080",
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        registry.register_peer("agent-frontend", "http://frontend:8081", streaming=streaming)
+        blob = "x" * (300 * 1024)
+
+        result = await registry.call_peer(registry.get_peer("agent-frontend"), "cacp/context/sync", {"blob": blob})
+
+        assert result == {"status": "ok"}
+        encoding, size = seen[0]
+        assert size > len(blob)
+        assert (encoding == "chunked") is streaming
+
+
+class TestADPCache:
+    """Test that ADP lookups are cached and coalesced."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_discovery_hits_adp_once(self, registry, adp):
+        results = await asyncio.gather(*(registry.discover_via_adp(role="frontend") for _ in range(5)))
+
+        assert adp.searches == 1
+        assert all(len(peers) == 1 for peers in results)
+        # The lookup lock is dropped once nobody holds or waits on it
+        assert len(registry._adp_locks) == 0
+
+    @pytest.mark.asyncio
+    async def test_unregister_invalidates_discovery(self, registry, adp):
+        await registry.discover_via_adp(role="frontend")
+        registry.unregister_peer("aid://example.com/frontend@1.0.0")
+        peers = await registry.discover_via_adp(role="frontend")
+
+        assert adp.searches == 2
+        assert [p.agent_id for p in peers] == ["aid://example.com/frontend@1.0.0"]
+
+    @pytest.mark.asyncio
+    async def test_add_peer_by_aid_is_cached(self, registry, adp):
+        first = await registry.add_peer_by_aid("aid://example.com/mobile@1.0.0")
+        second = await registry.add_peer_by_aid("aid://example.com/mobile@1.0.0")
+
+        assert adp.gets == 1
+        assert first is second
+        assert first.endpoint == "http://mobile:8082"
+
+    @pytest.mark.asyncio
+    async def test_add_peers_by_aids_resolves_each(self, registry, adp):
+        aids = ["aid://example.com/mobile@1.0.0", "aid://example.com/docs@1.0.0"]
+        peers = await registry.add_peers_by_aids(aids)
+
+        assert adp.gets == 2
+        assert [p.agent_id for p in peers] == aids
+
+
+class TestAgentCardCache:
+    """Test ETag revalidation of agent cards during direct discovery."""
+
+    @pytest.mark.asyncio
+    async def test_rediscovery_revalidates_with_etag(self):
+        app = create_app(
+            agent_id="agent-frontend",
+            repo_name="frontend-app",
+            repo_role="frontend",
+            language="typescript",
+            store=MemoryStore(),
+        )
+        statuses = []
+
+        async def record(response):
+            statuses.append(response.status_code)
+
+        registry = PeerRegistry(
+            "agent-backend",
+            "http://backend:8080",
+            http_client=httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                event_hooks={"response": [record]},
+            ),
+        )
+
+        first = await registry.discover_peer("http://frontend:8081")
+        second = await registry.discover_peer("http://frontend:8081")
+
+        assert statuses == [200, 304]
+        assert first.agent_id == second.agent_id == "agent-frontend"
+        assert second.repo_name == "frontend-app"
+
+
+class TestRegisterWith:
+    """Test single round-trip registration with a peer."""
+
+    @pytest.mark.asyncio
+    async def test_announce_comes_back_inline(self):
+        frontend_peers = RecordingPeerRegistry("agent-frontend", "http://frontend:8081")
+        app = create_app(
+            agent_id="agent-frontend",
+            repo_name="frontend-app",
+            repo_role="frontend",
+            language="typescript",
+            store=MemoryStore(),
+            peer_registry=frontend_peers,
+        )
+        registry = PeerRegistry(
+            "agent-backend",
+            "http://backend:8080",
+            http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=app)),
+        )
+
+        peer = await registry.register_with("http://frontend:8081", repo_name="backend-api")
+
+        assert peer.agent_id == "agent-frontend"
+        assert peer.endpoint == "http://frontend:8081"
+        assert peer.repo_name == "frontend-app"
+        assert frontend_peers.get_peer("agent-backend").repo_name == "backend-api"
+        # No announce call back to us
+        assert frontend_peers.calls == []
+
+
+class TestMsgpack:
+    """Test MessagePack requests between peers that both support it."""
+
+    def test_peer_falls_back_to_json_without_ormsgpack(self, registry, monkeypatch):
+        monkeypatch.setattr(codec, "MSGPACK_AVAILABLE", False)
+        peer = registry.register_peer("agent-frontend", "http://frontend:8081", msgpack=True)
+        assert peer.msgpack is False
+
+    @pytest.fixture
+    def stub_msgpack(self, monkeypatch):
+        """Stand in for ormsgpack with a JSON-backed packer so the msgpack path runs anywhere."""
+        stub = types.SimpleNamespace(packb=lambda obj: json.dumps(obj).encode(), unpackb=json.loads)
+        monkeypatch.setattr(codec, "ormsgpack", stub)
+        monkeypatch.setattr(codec, "MSGPACK_AVAILABLE", True)
+
+    @pytest.mark.asyncio
+    async def test_msgpack_call_carries_raw_params(self, stub_msgpack):
+        store = MemoryStore()
+        app = create_app(
+            agent_id="agent-frontend",
+            repo_name="frontend-app",
+            repo_role="frontend",
+            language="typescript",
+            store=store,
+        )
+        registry = PeerRegistry(
+            "agent-backend",
+            "http://backend:8080",
+            http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=app)),
+        )
+        peer = await registry.discover_peer("http://frontend:8081")
+        assert peer.msgpack is True
+
+        project = Project(name="Packed", objective="Test")
+        result = await registry.call_peer(peer, "cacp/project/sync", {
+            "project": codec.RawJSON(project.model_dump_json(exclude_none=True).encode()),
+            "source_agent": "agent-backend",
+        })
+
+        assert result["status"] == "created"
+        assert store.get_project(project.project_id).name == "Packed"
@@ -0,0 +1,19 @@
+"""
+Tests for project-scoped JWT tokens.
+"""
+
+from src.security import generate_project_token, validate_project_token
+from src.security.project_tokens import PERMISSIONS_CONTRIBUTOR
+
+
+class TestPermissionInterning:
+    """Test that decoded permissions share the standard sets' strings."""
+
+    def test_validated_permissions_are_the_shared_strings(self):
+        token = generate_project_token("project-1", "agent-frontend", "repo-1", PERMISSIONS_CONTRIBUTOR)
+
+        claims = validate_project_token(token, "project-1")
+
+        assert claims["permissions"] == PERMISSIONS_CONTRIBUTOR
+        assert isinstance(claims["permissions"], tuple)
+        assert all(decoded is shared for decoded, shared in zip(claims["permissions"], PERMISSIONS_CONTRIBUTOR))
@@ -0,0 +1,150 @@
+"""
+Tests for the agent HTTP server: endpoints, middleware, lifecycle and
+JSON-RPC method routing.
+"""
+
+import httpx
+import pytest
+
+from src.store import MemoryStore
+from src.transport import PeerRegistry, create_app
+from src.transport.server import _build_routes
+
+
+class TestPeerListing:
+    """Test the cached /peers listing."""
+
+    @pytest.mark.asyncio
+    async def test_peer_listing_tracks_registry_version(self):
+        peers = PeerRegistry("agent-backend", "http://backend:8080")
+        app = create_app(
+            agent_id="agent-backend",
+            repo_name="backend-api",
+            repo_role="backend",
+            language="python",
+            store=MemoryStore(),
+            peer_registry=peers,
+        )
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://backend:8080"
+        ) as client:
+            assert (await client.get("/peers")).json() == {"peers": []}
+
+            peers.register_peer("agent-frontend", "http://frontend:8081")
+            listed = (await client.get("/peers")).json()["peers"]
+
+        assert [p["agentId"] for p in listed] == ["agent-frontend"]
+
+
+class TestLifespan:
+    """Test what an app releases on shutdown."""
+
+    @pytest.mark.asyncio
+    async def test_app_shutdown_leaves_pool_to_other_apps(self):
+        apps = [
+            create_app(
+                agent_id=agent_id,
+                repo_name=agent_id,
+                repo_role="backend",
+                language="python",
+                store=MemoryStore(),
+            )
+            for agent_id in ("agent-backend", "agent-frontend")
+        ]
+        shared = await apps[0].state.peer_registry._get_client()
+        assert await apps[1].state.peer_registry._get_client() is shared
+
+        async with apps[0].router.lifespan_context(apps[0]):
+            pass
+        assert not shared.is_closed
+
+        async with apps[1].router.lifespan_context(apps[1]):
+            pass
+        assert shared.is_closed
+
+
+class TestCORS:
+    """Test that CORS headers are only added for browser requests."""
+
+    @pytest.mark.asyncio
+    async def test_origin_header_controls_cors(self):
+        app = create_app(
+            agent_id="agent-backend",
+            repo_name="backend-api",
+            repo_role="backend",
+            language="python",
+            store=MemoryStore(),
+            cors_origins=["https://dashboard.example.com"],
+        )
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://backend:8080"
+        ) as client:
+            peer = await client.get("/health")
+            browser = await client.get("/health", headers={"Origin": "https://dashboard.example.com"})
+
+        assert "access-control-allow-origin" not in peer.headers
+        assert browser.headers["access-control-allow-origin"] == "https://dashboard.example.com"
+
+
+class TestRouteTable:
+    """Test startup validation of the JSON-RPC method tables."""
+
+    def test_handler_in_wrong_table_is_rejected(self):
+        async def write(params):
+            return {}
+
+        with pytest.raises(ValueError, match="cacp/project/create"):
+            _build_routes({"cacp/project/create": write}, {})
+
+    def test_method_in_both_tables_is_rejected(self):
+        async def write(params):
+            return {}
+
+        with pytest.raises(ValueError, match="both"):
+            _build_routes({"cacp/project/get": dict}, {"cacp/project/get": write})
+
+
+class TestFileStream:
+    """Test sharing a file as a raw streamed body."""
+
+    @pytest.mark.asyncio
+    async def test_streamed_file_is_saved(self, tmp_path):
+        store = MemoryStore()
+        app = create_app(
+            agent_id="agent-backend",
+            repo_name="backend-api",
+            repo_role="backend",
+            language="python",
+            store=store,
+            workspace_path=str(tmp_path),
+        )
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://backend:8080"
+        ) as client:
+            created = await client.post("/", json={
+                "jsonrpc": "2.0",
+                "method": "cacp/project/create",
+                "params": {
+                    "name": "Demo",
+                    "objective": "Test",
+                    "repos": [{"name": "backend-api", "role": "backend", "language": "python"}],
+                },
+                "id": 1,
+            })
+            project_id = created.json()["result"]["projectId"]
+
+            async def body():
+                yield b"openapi: 3.0.0\n"
+                yield b"paths: {}\n"
+
+            response = await client.post(
+                "/files/share",
+                params={"projectId": project_id, "name": "../spec.yaml"},
+                content=body(),
+            )
+
+        result = response.json()
+        assert result["size"] == 25
+        saved = tmp_path / project_id / result["savedTo"].rsplit("/", 1)[1]
+        assert saved.read_bytes() == b"openapi: 3.0.0\npaths: {}\n"
+        assert saved.name.endswith("_spec.yaml")
@@ -5,119 +5,47 @@ This test runs two CACP agents in-memory and verifies they can coordinate.
 """
 
 import pytest
-import asyncio
-from fastapi.testclient import TestClient
-import httpx
 
-import sys
-sys.path.insert(0, ".")
 
-from src.store import MemoryStore
-from src.transport import create_app, CACPClient
-
-
-class InMemoryClient:
-    """Client that talks directly to a TestClient instead of HTTP."""
-
-    def __init__(self, test_client: TestClient, agent_id: str):
-        self.client = test_client
-        self.agent_id = agent_id
-
-    def call_sync(self, method: str, params: dict) -> dict:
-        response = self.client.post("/", json={
-            "jsonrpc": "2.0",
-            "method": method,
-            "params": params,
-            "id": "test",
-        })
-        data = response.json()
-        if "error" in data:
-            raise Exception(f"RPC Error: {data['error']['message']}")
-        return data.get("result", {})
-
-
-@pytest.fixture
-def backend_agent():
-    """Create a backend agent."""
-    store = MemoryStore()
-    app = create_app(
-        agent_id="agent-backend",
-        repo_name="backend-api",
-        repo_role="backend",
-        language="python",
-        store=store,
-    )
-    return TestClient(app), store
-
-
-@pytest.fixture
-def frontend_agent():
-    """Create a frontend agent."""
-    store = MemoryStore()
-    app = create_app(
-        agent_id="agent-frontend",
-        repo_name="frontend-app",
-        repo_role="frontend",
-        language="typescript",
-        store=store,
-    )
-    return TestClient(app), store
-
-
-@pytest.fixture
-def shared_store():
-    """Create a shared store for both agents (simulates distributed state)."""
-    return MemoryStore()
-
-
-@pytest.fixture
-def backend_with_shared_store(shared_store):
-    """Backend agent with shared store."""
-    app = create_app(
-        agent_id="agent-backend",
-        repo_name="backend-api",
-        repo_role="backend",
-        language="python",
-        store=shared_store,
-    )
-    return TestClient(app)
+# The two-repo layout most tests coordinate over; never mutated
+STANDARD_REPOS = (
+    {"name": "backend-api", "role": "backend", "language": "python"},
+    {"name": "frontend-app", "role": "frontend", "language": "typescript"},
+)
 
 
 @pytest.fixture
-def frontend_with_shared_store(shared_store):
-    """Frontend agent with shared store."""
-    app = create_app(
-        agent_id="agent-frontend",
-        repo_name="frontend-app",
-        repo_role="frontend",
-        language="typescript",
-        store=shared_store,
-    )
-    return TestClient(app)
+def backend_agent(distributed_agents):
+    """The backend agent's HTTP client and store."""
+    backend = distributed_agents["backend"]
+    return backend["client"].client, backend["store"]
 
 
 class TestAgentHealth:
     """Test basic agent functionality."""
 
-    def test_health_check(self, backend_agent):
+    @pytest.mark.asyncio
+    async def test_health_check(self, backend_agent):
         client, _ = backend_agent
-        response = client.get("/health")
+        response = await client.get("/health")
         assert response.status_code == 200
         data = response.json()
         assert data["status"] == "healthy"
         assert data["agentId"] == "agent-backend"
 
-    def test_agent_card(self, backend_agent):
+    @pytest.mark.asyncio
+    async def test_agent_card(self, backend_agent):
         client, _ = backend_agent
-        response = client.get("/.well-known/agent.json")
+        response = await client.get("/.well-known/agent.json")
         assert response.status_code == 200
         data = response.json()
         assert data["protocols"]["cacp"] == "2.0"
         assert data["extensions"]["cacp"]["repo"] == "backend-api"
 
-    def test_list_methods(self, backend_agent):
+    @pytest.mark.asyncio
+    async def test_list_methods(self, backend_agent):
         client, _ = backend_agent
-        response = client.get("/methods")
+        response = await client.get("/methods")
         assert response.status_code == 200
         methods = response.json()["methods"]
         assert "cacp/project/create" in methods
@@ -127,24 +55,22 @@ class TestAgentHealth:
 class TestTwoAgentCoordination:
     """Test two agents coordinating on a project."""
 
-    def test_full_coordination_flow(self, backend_with_shared_store, frontend_with_shared_store):
-        backend = InMemoryClient(backend_with_shared_store, "agent-backend")
-        frontend = InMemoryClient(frontend_with_shared_store, "agent-frontend")
+    @pytest.mark.asyncio
+    async def test_full_coordination_flow(self, distributed_agents):
+        backend = distributed_agents["backend"]["client"]
+        frontend = distributed_agents["frontend"]["client"]
 
         # Step 1: Backend creates project
-        project_result = backend.call_sync("cacp/project/create", {
+        project_result = await backend.call("cacp/project/create", {
             "name": "Test Project",
             "objective": "Test coordination",
-            "repos": [
-                {"name": "backend-api", "role": "backend", "language": "python"},
-                {"name": "frontend-app", "role": "frontend", "language": "typescript"},
-            ],
+            "repos": list(STANDARD_REPOS),
         })
         project_id = project_result["projectId"]
         assert project_result["status"] == "created"
 
         # Step 2: Frontend joins
-        join_result = frontend.call_sync("cacp/project/join", {
+        join_result = await frontend.call("cacp/project/join", {
             "projectId": project_id,
             "repoName": "frontend-app",
             "agentEndpoint": "http://frontend:8081",
@@ -152,7 +78,7 @@ class TestTwoAgentCoordination:
         assert join_result["status"] == "joined"
 
         # Step 3: Backend proposes contract
-        contract_result = backend.call_sync("cacp/contract/propose", {
+        contract_result = await backend.call("cacp/contract/propose", {
             "projectId": project_id,
             "type": "api_endpoint",
             "name": "Test Endpoint",
@@ -167,7 +93,7 @@ class TestTwoAgentCoordination:
         assert contract_result["status"] == "proposed"
 
         # Step 4: Frontend agrees
-        response_result = frontend.call_sync("cacp/contract/respond", {
+        response_result = await frontend.call("cacp/contract/respond", {
             "projectId": project_id,
             "contractId": contract_id,
             "action": "agree",
@@ -175,7 +101,7 @@ class TestTwoAgentCoordination:
         assert response_result["status"] == "agreed"
 
         # Step 5: Backend shares context
-        context_result = backend.call_sync("cacp/context/share", {
+        context_result = await backend.call("cacp/context/share", {
             "projectId": project_id,
             "type": "code_snippet",
             "content": {
@@ -189,7 +115,7 @@ class TestTwoAgentCoordination:
         assert context_result["status"] == "shared"
 
         # Step 6: Frontend asks question
-        question_result = frontend.call_sync("cacp/context/askQuestion", {
+        question_result = await frontend.call("cacp/context/askQuestion", {
             "projectId": project_id,
             "question": "What format for the response?",
             "options": ["JSON", "XML"],
@@ -197,7 +123,7 @@ class TestTwoAgentCoordination:
         assert question_result["status"] == "shared"
 
         # Step 7: Backend records decision
-        decision_result = backend.call_sync("cacp/context/recordDecision", {
+        decision_result = await backend.call("cacp/context/recordDecision", {
             "projectId": project_id,
             "decision": "Response format",
             "chosen": "JSON",
@@ -207,23 +133,23 @@ class TestTwoAgentCoordination:
         assert decision_result["status"] == "shared"
 
         # Step 8: Both implement
-        backend.call_sync("cacp/implementation/start", {
+        await backend.call("cacp/implementation/start", {
             "projectId": project_id,
             "contractId": contract_id,
             "plan": "Implement endpoint",
         })
-        backend.call_sync("cacp/implementation/complete", {
+        await backend.call("cacp/implementation/complete", {
             "projectId": project_id,
             "contractId": contract_id,
             "files": ["src/api.py"],
         })
 
-        frontend.call_sync("cacp/implementation/start", {
+        await frontend.call("cacp/implementation/start", {
             "projectId": project_id,
             "contractId": contract_id,
             "plan": "Implement client",
         })
-        complete_result = frontend.call_sync("cacp/implementation/complete", {
+        complete_result = await frontend.call("cacp/implementation/complete", {
             "projectId": project_id,
             "contractId": contract_id,
             "files": ["src/client.ts"],
@@ -231,7 +157,7 @@ class TestTwoAgentCoordination:
         assert complete_result["contractStatus"] == "implemented"
 
         # Step 9: Verify
-        verify_result = backend.call_sync("cacp/implementation/verify", {
+        verify_result = await backend.call("cacp/implementation/verify", {
             "projectId": project_id,
             "contractId": contract_id,
             "result": "success",
@@ -239,7 +165,7 @@ class TestTwoAgentCoordination:
         assert verify_result["contractStatus"] == "verified"
 
         # Final check
-        project = backend.call_sync("cacp/project/get", {"projectId": project_id})
+        project = await backend.call("cacp/project/get", {"projectId": project_id})
         assert len(project["contracts"]) == 1
         assert project["contracts"][0]["status"] == "verified"
         assert len(project["context_history"]) == 3  # code, question, decision
@@ -248,29 +174,27 @@ class TestTwoAgentCoordination:
 class TestContractNegotiation:
     """Test contract negotiation flow."""
 
-    def test_request_change_flow(self, backend_with_shared_store, frontend_with_shared_store):
-        backend = InMemoryClient(backend_with_shared_store, "agent-backend")
-        frontend = InMemoryClient(frontend_with_shared_store, "agent-frontend")
+    @pytest.mark.asyncio
+    async def test_request_change_flow(self, distributed_agents):
+        backend = distributed_agents["backend"]["client"]
+        frontend = distributed_agents["frontend"]["client"]
 
         # Create project
-        project = backend.call_sync("cacp/project/create", {
+        project = await backend.call("cacp/project/create", {
             "name": "Negotiation Test",
             "objective": "Test negotiation",
-            "repos": [
-                {"name": "backend-api", "role": "backend", "language": "python"},
-                {"name": "frontend-app", "role": "frontend", "language": "typescript"},
-            ],
+            "repos": list(STANDARD_REPOS),
         })
         project_id = project["projectId"]
 
-        frontend.call_sync("cacp/project/join", {
+        await frontend.call("cacp/project/join", {
             "projectId": project_id,
             "repoName": "frontend-app",
             "agentEndpoint": "http://frontend:8081",
         })
 
         # Backend proposes
-        contract = backend.call_sync("cacp/contract/propose", {
+        contract = await backend.call("cacp/contract/propose", {
             "projectId": project_id,
             "type": "api_endpoint",
             "name": "User Endpoint",
@@ -279,7 +203,7 @@ class TestContractNegotiation:
         contract_id = contract["contractId"]
 
         # Frontend requests change
-        response = frontend.call_sync("cacp/contract/respond", {
+        response = await frontend.call("cacp/contract/respond", {
             "projectId": project_id,
             "contractId": contract_id,
             "action": "request_change",
@@ -288,7 +212,7 @@ class TestContractNegotiation:
         assert response["contractStatus"] == "negotiating"
 
         # Backend updates
-        update = backend.call_sync("cacp/contract/update", {
+        update = await backend.call("cacp/contract/update", {
             "projectId": project_id,
             "contractId": contract_id,
             "content": {"method": "POST", "path": "/user"},
@@ -297,7 +221,7 @@ class TestContractNegotiation:
         assert update["version"] == 2
 
         # Frontend agrees
-        final = frontend.call_sync("cacp/contract/respond", {
+        final = await frontend.call("cacp/contract/respond", {
             "projectId": project_id,
             "contractId": contract_id,
             "action": "agree",
@@ -305,7 +229,7 @@ class TestContractNegotiation:
         assert final["contractStatus"] == "agreed"
 
         # Check history
-        contract_detail = backend.call_sync("cacp/contract/get", {
+        contract_detail = await backend.call("cacp/contract/get", {
             "projectId": project_id,
             "contractId": contract_id,
             "includeHistory": True,